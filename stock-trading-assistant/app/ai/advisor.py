@@ -3,28 +3,96 @@ AI Chat module for portfolio advice using Claude
 """
 import anthropic
 from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
+from itertools import islice
+import asyncio
+import io
 import json
 import logging
+import re
 
 from app.config import get_settings
 from app.data.market_data import get_stock_info, get_historical_data
+from app.data.screener import WATCHLIST_CATEGORIES
 from app.data.forex import convert_to_chf, get_exchange_rate_to_chf
 from app.analysis.engine import get_analysis_engine
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Look for patterns like AAPL, NVDA, ITR.V, NESN.SW
+_TICKER_RE = re.compile(r'\b([A-Z]{1,5}(?:\.[A-Z]{1,2})?)\b')
+
+# Capitalized words that match the ticker pattern but aren't tickers
+_COMMON_WORDS = frozenset({'I', 'A', 'THE', 'AND', 'OR', 'TO', 'IN', 'FOR', 'ON', 'WITH', 'MY', 'IS', 'IT', 'BE', 'AS', 'AT', 'BY', 'IF', 'OF', 'SO', 'DO', 'AM', 'AN', 'AI', 'US', 'UK', 'EU', 'VS', 'CEO', 'CFO', 'IPO', 'ETF', 'USD', 'CHF', 'EUR', 'CAD', 'GBP', 'BUY', 'SELL', 'HOLD', 'NEW', 'ALL', 'WHAT', 'HOW', 'WHY', 'WHEN', 'CAN', 'YOU', 'YOUR'})
+
+# Yahoo-style ticker suffixes mapped to exchange names
+_SUFFIX_EXCHANGES = {"V": "TSX-V", "SW": "SIX", "TO": "TSX"}
+
+# Exchanges of watchlist tickers, so e.g. a bare "NESN" resolves to SIX
+_KNOWN_EXCHANGES = {
+    ticker: exchange
+    for stocks in WATCHLIST_CATEGORIES.values()
+    for ticker, exchange in stocks
+}
+
+# Fixed instructions; the chat prompt gets the per-turn portfolio and
+# analysis context appended. Both are far below the API's minimum
+# cacheable prefix (1024 tokens), so no cache_control is set
+CHAT_SYSTEM_PROMPT = """You are an AI trading assistant helping a user manage their stock portfolio. 
+You have access to their current portfolio and can analyze stocks.
+
+USER'S BASE CURRENCY: CHF (Swiss Francs)
+RISK ALLOCATION TARGET: 70% moderate, 30% aggressive
+
+You can help with:
+- Portfolio analysis and recommendations
+- Suggesting new stocks to buy
+- Analyzing when to sell positions
+- Building diversified portfolios
+- Explaining market conditions and stock analysis
+
+When recommending stocks, be specific with:
+- Ticker symbols and exchanges
+- Number of shares based on available cash
+- Risk category (conservative/moderate/aggressive)
+- Brief reasoning
+
+Always consider the user's available cash and current allocation when making recommendations.
+Be concise but informative. Use CHF for all values."""
+
+PORTFOLIO_SYSTEM_PROMPT = """You are a portfolio advisor. Suggest real, investable stocks available on major exchanges (NYSE, NASDAQ, TSX, SIX Swiss Exchange).
+Be specific with ticker symbols and share counts. Calculate costs in CHF.
+Consider current market conditions and diversification across sectors."""
+
 
 class AIAdvisor:
     """AI-powered portfolio advisor using Claude"""
     
     def __init__(self):
         self.api_key = settings.anthropic_api_key
-        if self.api_key:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
-        else:
-            self.client = None
-        self.engine = get_analysis_engine()
+        # Created on first use so probes like is_configured() stay cheap
+        self._client = None
+        self._async_client = None
+        self._engine = None
+    
+    @property
+    def client(self) -> Optional[anthropic.Anthropic]:
+        if self._client is None and self.api_key:
+            self._client = anthropic.Anthropic(api_key=self.api_key)
+        return self._client
+    
+    @property
+    def async_client(self) -> Optional[anthropic.AsyncAnthropic]:
+        if self._async_client is None and self.api_key:
+            self._async_client = anthropic.AsyncAnthropic(api_key=self.api_key)
+        return self._async_client
+    
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = get_analysis_engine()
+        return self._engine
     
     def is_configured(self) -> bool:
         return bool(self.api_key)
@@ -47,45 +115,37 @@ class AIAdvisor:
             # Build context about the portfolio
             portfolio_context = self._build_portfolio_context(portfolio)
             
-            # System prompt
-            system_prompt = f"""You are an AI trading assistant helping a user manage their stock portfolio. 
-You have access to their current portfolio and can analyze stocks.
-
-CURRENT PORTFOLIO:
-{portfolio_context}
-
-USER'S BASE CURRENCY: CHF (Swiss Francs)
-RISK ALLOCATION TARGET: 70% moderate, 30% aggressive
-
-You can help with:
-- Portfolio analysis and recommendations
-- Suggesting new stocks to buy
-- Analyzing when to sell positions
-- Building diversified portfolios
-- Explaining market conditions and stock analysis
-
-When recommending stocks, be specific with:
-- Ticker symbols and exchanges
-- Number of shares based on available cash
-- Risk category (conservative/moderate/aggressive)
-- Brief reasoning
-
-Always consider the user's available cash and current allocation when making recommendations.
-Be concise but informative. Use CHF for all values."""
-
             # Check if user is asking about specific stocks - analyze them
             analysis_results = self._analyze_mentioned_stocks(message)
             
-            if analysis_results:
-                system_prompt += f"\n\nREAL-TIME ANALYSIS OF MENTIONED STOCKS:\n{analysis_results}"
-
             response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=1500,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": message}
-                ]
+                **self._chat_request(message, portfolio_context, analysis_results)
+            )
+            
+            return response.content[0].text
+            
+        except Exception as e:
+            logger.error(f"AI chat error: {e}")
+            return f"Sorry, I encountered an error: {str(e)}"
+    
+    async def chat_async(self, message: str, portfolio: Dict[str, Any]) -> str:
+        """
+        Async variant of chat() that doesn't block the event loop
+        
+        Portfolio context and stock analysis are built concurrently in worker
+        threads, then the Claude call is awaited.
+        """
+        if not self.is_configured():
+            return "AI chat is not configured. Please add ANTHROPIC_API_KEY to your environment variables."
+        
+        try:
+            portfolio_context, analysis_results = await asyncio.gather(
+                asyncio.to_thread(self._build_portfolio_context, portfolio),
+                asyncio.to_thread(self._analyze_mentioned_stocks, message),
+            )
+            
+            response = await self.async_client.messages.create(
+                **self._chat_request(message, portfolio_context, analysis_results)
             )
             
             return response.content[0].text
@@ -94,63 +154,93 @@ Be concise but informative. Use CHF for all values."""
             logger.error(f"AI chat error: {e}")
             return f"Sorry, I encountered an error: {str(e)}"
     
+    def _chat_request(self, message: str, portfolio_context: str, analysis_results: str) -> Dict[str, Any]:
+        """Build the messages.create() arguments for a chat turn"""
+        system_prompt = f"{CHAT_SYSTEM_PROMPT}\n\nCURRENT PORTFOLIO:\n{portfolio_context}"
+        if analysis_results:
+            system_prompt += f"\n\nREAL-TIME ANALYSIS OF MENTIONED STOCKS:\n{analysis_results}"
+        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 1500,
+            "system": system_prompt,
+            "messages": [
+                {"role": "user", "content": message}
+            ],
+        }
+    
     def _build_portfolio_context(self, portfolio: Dict[str, Any]) -> str:
         """Build a text summary of the portfolio for the AI"""
-        lines = []
+        total_value, cash, holdings_value, pnl, pnl_pct = (
+            portfolio.get(key, 0)
+            for key in ("total_value_chf", "cash_chf", "holdings_value_chf", "unrealized_pnl_chf", "unrealized_pnl_pct")
+        )
         
-        lines.append(f"Total Value: CHF {portfolio.get('total_value_chf', 0):,.2f}")
-        lines.append(f"Cash Available: CHF {portfolio.get('cash_chf', 0):,.2f}")
-        lines.append(f"Holdings Value: CHF {portfolio.get('holdings_value_chf', 0):,.2f}")
-        lines.append(f"Unrealized P&L: CHF {portfolio.get('unrealized_pnl_chf', 0):,.2f} ({portfolio.get('unrealized_pnl_pct', 0):.1f}%)")
-        lines.append("")
-        lines.append("HOLDINGS:")
+        buf = io.StringIO()
+        write = buf.write
+        write(
+            f"Total Value: CHF {total_value:,.2f}\n"
+            f"Cash Available: CHF {cash:,.2f}\n"
+            f"Holdings Value: CHF {holdings_value:,.2f}\n"
+            f"Unrealized P&L: CHF {pnl:,.2f} ({pnl_pct:.1f}%)\n"
+            f"\n"
+            f"HOLDINGS:"
+        )
         
         holdings = portfolio.get('holdings', [])
         if not holdings:
-            lines.append("  (No holdings)")
+            write("\n  (No holdings)")
         else:
             for h in holdings:
-                lines.append(f"  {h['ticker']} ({h['exchange']}): {h['shares']:.0f} shares")
-                lines.append(f"    Current: {h.get('current_currency', 'USD')} {h.get('current_price', 0):.2f} = CHF {h['current_value_chf']:,.2f}")
-                lines.append(f"    P&L: CHF {h['unrealized_pnl_chf']:,.2f} ({h['unrealized_pnl_pct']:.1f}%)")
-                lines.append(f"    Risk: {h['risk_category']}")
+                get = h.get
+                write(
+                    f"\n  {h['ticker']} ({h['exchange']}): {h['shares']:.0f} shares"
+                    f"\n    Current: {get('current_currency', 'USD')} {get('current_price', 0):.2f} = CHF {h['current_value_chf']:,.2f}"
+                    f"\n    P&L: CHF {h['unrealized_pnl_chf']:,.2f} ({h['unrealized_pnl_pct']:.1f}%)"
+                    f"\n    Risk: {h['risk_category']}"
+                )
         
-        return "\n".join(lines)
+        return buf.getvalue()
     
     def _analyze_mentioned_stocks(self, message: str) -> str:
         """Extract and analyze any stock tickers mentioned in the message"""
-        # Common tickers to look for
-        import re
-        
-        # Look for patterns like AAPL, NVDA, ITR.V, NESN.SW
-        potential_tickers = re.findall(r'\b([A-Z]{1,5}(?:\.[A-Z]{1,2})?)\b', message.upper())
+        # Tickers are typed in capitals; skip the scan for all-lowercase chat
+        if not any(ch.isupper() for ch in message):
+            return ""
         
-        # Filter out common words
-        common_words = {'I', 'A', 'THE', 'AND', 'OR', 'TO', 'IN', 'FOR', 'ON', 'WITH', 'MY', 'IS', 'IT', 'BE', 'AS', 'AT', 'BY', 'IF', 'OF', 'SO', 'DO', 'AM', 'AN', 'AI', 'US', 'UK', 'EU', 'VS', 'CEO', 'CFO', 'IPO', 'ETF', 'USD', 'CHF', 'EUR', 'CAD', 'GBP', 'BUY', 'SELL', 'HOLD', 'NEW', 'ALL', 'WHAT', 'HOW', 'WHY', 'WHEN', 'CAN', 'YOU', 'YOUR'}
-        tickers = [t for t in potential_tickers if t not in common_words]
+        # Limit to first 5 distinct tickers, in order of first mention
+        tickers = list(islice(
+            dict.fromkeys(m.group(1) for m in _TICKER_RE.finditer(message.upper()) if m.group(1) not in _COMMON_WORDS),
+            5
+        ))
         
         if not tickers:
             return ""
         
-        # Limit to first 5 tickers
-        tickers = tickers[:5]
-        
-        results = []
+        # Determine exchange and base symbol for each ticker
+        prepared = []
         for ticker in tickers:
+            base, _, suffix = ticker.partition(".")
+            exchange = _SUFFIX_EXCHANGES.get(suffix)
+            if exchange is None:
+                base, exchange = ticker, _KNOWN_EXCHANGES.get(ticker, "")
+            prepared.append((ticker, base, exchange))
+        
+        # Stock info is fetched in one batch, the rest of each analysis concurrently
+        analyses = self.engine.analyze_stocks(
+            [(base, exchange) for _, base, exchange in prepared],
+            analyzed_at=datetime.now(timezone.utc).isoformat()
+        )
+        
+        buf = io.StringIO()
+        write = buf.write
+        separator = ""
+        for ticker, base, exchange in prepared:
+            analysis = analyses.get((base, exchange))
+            if not analysis or "error" in analysis:
+                continue
             try:
-                # Determine exchange
-                exchange = ""
-                if ".V" in ticker:
-                    exchange = "TSX-V"
-                elif ".SW" in ticker:
-                    exchange = "SIX"
-                elif ".TO" in ticker:
-                    exchange = "TSX"
-                
-                analysis = self.engine.analyze_stock(ticker.replace(".V", "").replace(".SW", "").replace(".TO", ""), exchange)
-                
-                if "error" not in analysis:
-                    results.append(f"""
+                write(f"""{separator}
 {ticker}:
   Price: {analysis['currency']} {analysis['current_price']:.2f} (CHF {analysis['price_chf']:.2f})
   Recommendation: {analysis['recommendation']}
@@ -158,10 +248,11 @@ Be concise but informative. Use CHF for all values."""
   Technical: {analysis['technical']['score']:.0f} | Fundamental: {analysis['fundamental']['score']:.0f} | Sentiment: {analysis['sentiment']['score']:.0f}
   Risk Category: {analysis['risk_category']}
   Reasoning: {analysis['reasoning']}""")
+                separator = "\n"
             except Exception as e:
                 logger.debug(f"Could not analyze {ticker}: {e}")
         
-        return "\n".join(results)
+        return buf.getvalue()
     
     def suggest_portfolio(self, total_amount_chf: float, risk_profile: str = "balanced") -> str:
         """
@@ -174,22 +265,9 @@ Be concise but informative. Use CHF for all values."""
         if not self.is_configured():
             return "AI chat is not configured."
         
-        prompt = f"""I have CHF {total_amount_chf:,.2f} to invest. 
-My risk profile is {risk_profile}.
-Please suggest a diversified portfolio with specific stocks, number of shares, and allocation percentages.
-Include a mix of different sectors and geographies.
-Format it clearly with ticker symbols, exchanges, and estimated costs in CHF."""
-
         try:
             response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=2000,
-                system="""You are a portfolio advisor. Suggest real, investable stocks available on major exchanges (NYSE, NASDAQ, TSX, SIX Swiss Exchange).
-Be specific with ticker symbols and share counts. Calculate costs in CHF.
-Consider current market conditions and diversification across sectors.""",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+                **self._portfolio_request(total_amount_chf, risk_profile)
             )
             
             return response.content[0].text
@@ -197,7 +275,39 @@ Consider current market conditions and diversification across sectors.""",
         except Exception as e:
             logger.error(f"Portfolio suggestion error: {e}")
             return f"Error generating suggestion: {str(e)}"
-
+    
+    async def suggest_portfolio_async(self, total_amount_chf: float, risk_profile: str = "balanced") -> str:
+        """Async variant of suggest_portfolio()"""
+        if not self.is_configured():
+            return "AI chat is not configured."
+        
+        try:
+            response = await self.async_client.messages.create(
+                **self._portfolio_request(total_amount_chf, risk_profile)
+            )
+            
+            return response.content[0].text
+            
+        except Exception as e:
+            logger.error(f"Portfolio suggestion error: {e}")
+            return f"Error generating suggestion: {str(e)}"
+    
+    def _portfolio_request(self, total_amount_chf: float, risk_profile: str) -> Dict[str, Any]:
+        """Build the messages.create() arguments for a portfolio suggestion"""
+        prompt = f"""I have CHF {total_amount_chf:,.2f} to invest. 
+My risk profile is {risk_profile}.
+Please suggest a diversified portfolio with specific stocks, number of shares, and allocation percentages.
+Include a mix of different sectors and geographies.
+Format it clearly with ticker symbols, exchanges, and estimated costs in CHF."""
+        
+        return {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 2000,
+            "system": PORTFOLIO_SYSTEM_PROMPT,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+        }
 
 _advisor = None
 
@@ -2,16 +2,28 @@
 Analysis modules for stock evaluation
 """
 from app.analysis.engine import AnalysisEngine, get_analysis_engine
-from app.analysis.technical import calculate_technical_indicators, get_technical_score
-from app.analysis.fundamental import get_fundamental_score, classify_stock_risk
+from app.analysis.technical import (
+    calculate_technical_indicators,
+    calculate_technical_indicators_batch,
+    get_technical_score,
+)
+from app.analysis.fundamental import (
+    get_fundamental_score,
+    get_fundamental_scores_batch,
+    get_fundamental_scores_columnar,
+    classify_stock_risk,
+)
 from app.analysis.sentiment import get_sentiment_score, analyze_news_sentiment
 
 __all__ = [
     "AnalysisEngine",
     "get_analysis_engine",
     "calculate_technical_indicators",
+    "calculate_technical_indicators_batch",
     "get_technical_score",
     "get_fundamental_score",
+    "get_fundamental_scores_batch",
+    "get_fundamental_scores_columnar",
     "classify_stock_risk",
     "get_sentiment_score",
     "analyze_news_sentiment",
@@ -1,20 +1,87 @@
 """
 Main analysis engine that combines technical, fundamental, and sentiment analysis
 """
-from typing import Dict, Any, Optional, List, Tuple
-from datetime import datetime
+from typing import Dict, Any, Optional, List, Mapping, Tuple
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
 import logging
+import threading
+import time
 
 from app.analysis.technical import calculate_technical_indicators, get_technical_score, detect_patterns
 from app.analysis.fundamental import get_fundamental_score, classify_stock_risk
 from app.analysis.sentiment import get_sentiment_score, detect_unusual_activity
-from app.data.market_data import get_stock_info, get_historical_data, get_news_for_stock
+from app.data.market_data import get_stock_info, get_stock_info_batch, get_historical_data, get_news_for_stock
 from app.data.forex import convert_to_chf
-from app.config import get_settings, ANALYSIS_THRESHOLDS
+from app.config import get_settings, ANALYSIS_THRESHOLDS, RISK_CATEGORIES
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Short-lived cache so repeated questions about the same ticker don't refetch
+ANALYSIS_CACHE_SECONDS = 60
+ANALYSIS_CACHE_MAX_SIZE = 512
+
+# Scoring weights; read-only since engines share them
+WEIGHTS_NORMAL = MappingProxyType({
+    "technical": 0.40,
+    "fundamental": 0.35,
+    "sentiment": 0.15,
+    "risk_adjusted": 0.10,
+})
+# High volatility - weight technical more
+WEIGHTS_HIGH_VOLATILITY = MappingProxyType({
+    "technical": 0.50,
+    "fundamental": 0.25,
+    "sentiment": 0.15,
+    "risk_adjusted": 0.10,
+})
+# Low volatility - weight fundamentals more
+WEIGHTS_LOW_VOLATILITY = MappingProxyType({
+    "technical": 0.30,
+    "fundamental": 0.45,
+    "sentiment": 0.15,
+    "risk_adjusted": 0.10,
+})
+
+# Position sizing and stop-loss per risk category
+MAX_POSITION_PCT = {category: info["max_position_pct"] for category, info in RISK_CATEGORIES.items()}
+STOP_LOSS_PCT = {category: info["stop_loss_pct"] for category, info in RISK_CATEGORIES.items()}
+
+# Score adjustment per risk category
+RISK_SCORE_ADJUSTMENTS = {
+    "conservative": 10,   # Bonus for low-risk stocks
+    "moderate": 0,
+    "aggressive": -10,    # Penalty for high-risk stocks
+}
+
+# stock_info fields read by get_fundamental_score / classify_stock_risk
+FUNDAMENTAL_FIELDS = (
+    "pe_ratio", "forward_pe", "peg_ratio", "price_to_book",
+    "earnings_growth", "revenue_growth", "profit_margin", "operating_margin",
+    "free_cash_flow", "debt_to_equity", "current_ratio", "total_cash", "total_debt",
+    "recommendation", "target_price", "current_price",
+)
+RISK_FIELDS = ("market_cap", "beta", "sector", "exchange")
+
+
+def _field_items(stock_info: Dict[str, Any], fields: Tuple[str, ...]) -> Tuple[Tuple[str, Any], ...]:
+    """Extract the (key, value) pairs a scorer depends on as a hashable tuple"""
+    return tuple((key, stock_info[key]) for key in fields if key in stock_info)
+
+
+@lru_cache(maxsize=1024)
+def _cached_fundamental_score(items: Tuple[Tuple[str, Any], ...]) -> Dict[str, Any]:
+    return get_fundamental_score(dict(items))
+
+
+@lru_cache(maxsize=1024)
+def _cached_risk_category(items: Tuple[Tuple[str, Any], ...]) -> str:
+    return classify_stock_risk(dict(items))
+
 
 class AnalysisEngine:
     """
@@ -25,18 +92,29 @@ class AnalysisEngine:
         self.thresholds = ANALYSIS_THRESHOLDS
         
         # Default weights (can be adjusted based on market conditions)
-        self.weights = {
-            "technical": 0.40,
-            "fundamental": 0.35,
-            "sentiment": 0.15,
-            "risk_adjusted": 0.10,
-        }
+        self._set_weights(WEIGHTS_NORMAL)
+        
+        # Cache of recent analyses {(ticker, exchange, include_news): (analysis, timestamp)}
+        self._cache: Dict[Tuple[str, str, bool], Tuple[Dict[str, Any], float]] = {}
+        self._cache_lock = threading.Lock()
+    
+    def _set_weights(self, weights: Mapping[str, float]) -> None:
+        """Set scoring weights and the flat tuple used by _calculate_combined_score"""
+        self.weights = weights
+        self._weight_vec = (
+            weights["technical"],
+            weights["fundamental"],
+            weights["sentiment"],
+            weights["risk_adjusted"],
+        )
     
     def analyze_stock(
         self, 
         ticker: str, 
         exchange: str = "",
-        include_news: bool = True
+        include_news: bool = True,
+        analyzed_at: Optional[str] = None,
+        stock_info: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Perform comprehensive analysis on a stock
@@ -45,13 +123,21 @@ class AnalysisEngine:
             ticker: Stock symbol
             exchange: Exchange name
             include_news: Whether to fetch and analyze news
+            analyzed_at: ISO timestamp to stamp on the result (defaults to now, UTC)
+            stock_info: Already-fetched stock info (fetched here if omitted)
         
         Returns:
             Complete analysis dict with scores and recommendations
         """
+        cache_key = (ticker.upper(), exchange, include_news)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             # Fetch all required data
-            stock_info = get_stock_info(ticker, exchange)
+            if stock_info is None:
+                stock_info = get_stock_info(ticker, exchange)
             
             if not stock_info.get("current_price"):
                 return {
@@ -60,20 +146,25 @@ class AnalysisEngine:
                     "exchange": exchange,
                 }
             
-            # Get historical data for technical analysis
-            try:
-                historical = get_historical_data(ticker, exchange, period="1y")
-            except Exception as e:
-                logger.warning(f"Could not fetch historical data for {ticker}: {e}")
-                historical = None
-            
-            # Get news for sentiment
-            news_items = []
-            if include_news:
+            # Historical data and news are independent, so fetch them concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                historical_future = executor.submit(get_historical_data, ticker, exchange, period="1y")
+                news_future = executor.submit(get_news_for_stock, ticker) if include_news else None
+                
+                # Get historical data for technical analysis
                 try:
-                    news_items = get_news_for_stock(ticker)
+                    historical = historical_future.result()
                 except Exception as e:
-                    logger.warning(f"Could not fetch news for {ticker}: {e}")
+                    logger.warning(f"Could not fetch historical data for {ticker}: {e}")
+                    historical = None
+                
+                # Get news for sentiment
+                news_items = []
+                if news_future is not None:
+                    try:
+                        news_items = news_future.result()
+                    except Exception as e:
+                        logger.warning(f"Could not fetch news for {ticker}: {e}")
             
             # Perform analysis
             analysis = self._perform_analysis(stock_info, historical, news_items)
@@ -88,9 +179,11 @@ class AnalysisEngine:
                 stock_info.get("current_price", 0),
                 stock_info.get("currency", "USD")
             )
-            analysis["analyzed_at"] = datetime.utcnow().isoformat()
+            analysis["analyzed_at"] = analyzed_at or datetime.now(timezone.utc).isoformat()
             analysis["stock_info"] = stock_info
             
+            self._store_cached_analysis(cache_key, analysis)
+            
             return analysis
             
         except Exception as e:
@@ -101,6 +194,85 @@ class AnalysisEngine:
                 "exchange": exchange,
             }
     
+    def analyze_stocks(
+        self,
+        tickers: List[Tuple[str, str]],
+        include_news: bool = True,
+        analyzed_at: Optional[str] = None
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Analyze several stocks, fetching their stock info in one batch
+        
+        Args:
+            tickers: List of (ticker, exchange) tuples
+            include_news: Whether to fetch and analyze news
+            analyzed_at: ISO timestamp to stamp on every result (defaults to now, UTC)
+        
+        Returns:
+            Dict mapping (ticker, exchange) to its analysis
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        
+        analyzed_at = analyzed_at or datetime.now(timezone.utc).isoformat()
+        
+        # Only fetch info for tickers without a fresh cached analysis
+        results = {}
+        missing = []
+        for key in tickers:
+            cached = self._get_cached_analysis((key[0].upper(), key[1], include_news))
+            if cached is not None:
+                results[key] = cached
+            else:
+                missing.append(key)
+        
+        if not missing:
+            return results
+        
+        infos = get_stock_info_batch(missing)
+        
+        # History and news are still per ticker, so run the analyses concurrently
+        with ThreadPoolExecutor(max_workers=min(len(missing), 8)) as executor:
+            futures = {}
+            for key in missing:
+                info = infos.get(key)
+                if info is None:
+                    results[key] = {
+                        "error": f"Could not fetch data for {key[0]}",
+                        "ticker": key[0],
+                        "exchange": key[1],
+                    }
+                    continue
+                futures[key] = executor.submit(
+                    self.analyze_stock, key[0], key[1],
+                    include_news=include_news, analyzed_at=analyzed_at, stock_info=info
+                )
+            for key, future in futures.items():
+                results[key] = future.result()
+        
+        return results
+    
+    def _get_cached_analysis(self, key: Tuple[str, str, bool]) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached analysis if it is still fresh"""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            analysis, timestamp = entry
+            if time.monotonic() - timestamp >= ANALYSIS_CACHE_SECONDS:
+                del self._cache[key]
+                return None
+        # Callers annotate the result (e.g. with "action"), so hand out a copy
+        return dict(analysis)
+    
+    def _store_cached_analysis(self, key: Tuple[str, str, bool], analysis: Dict[str, Any]) -> None:
+        """Cache a successful analysis, evicting the oldest entry when full"""
+        with self._cache_lock:
+            if key not in self._cache and len(self._cache) >= ANALYSIS_CACHE_MAX_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = (dict(analysis), time.monotonic())
+    
     def _perform_analysis(
         self,
         stock_info: Dict[str, Any],
@@ -110,27 +282,35 @@ class AnalysisEngine:
         """
         Perform all analysis components
         """
-        # Technical Analysis
-        technical_result = {"score": 50, "signals": [], "error": "No historical data"}
-        patterns_result = {"patterns": []}
+        have_hist = historical is not None and not historical.empty
         
-        if historical is not None and not historical.empty:
+        # Technical Analysis
+        if have_hist:
             # Calculate indicators
             df_with_indicators = calculate_technical_indicators(historical)
             technical_result = get_technical_score(df_with_indicators)
             patterns_result = detect_patterns(historical)
+        else:
+            technical_result = {"score": 50, "signals": [], "error": "No historical data"}
+            patterns_result = {"patterns": []}
         
-        # Fundamental Analysis
-        fundamental_result = get_fundamental_score(stock_info)
+        # Fundamental Analysis (pure function of a few fields, memoized across stocks)
+        try:
+            fundamental_result = dict(_cached_fundamental_score(_field_items(stock_info, FUNDAMENTAL_FIELDS)))
+        except TypeError:  # Unhashable field value
+            fundamental_result = get_fundamental_score(stock_info)
         
         # Sentiment Analysis
         sentiment_result = get_sentiment_score(news_items, stock_info)
         
-        # Unusual Activity Detection
-        unusual_activity = detect_unusual_activity(stock_info, historical)
+        # Unusual Activity Detection (works from stock_info, so runs without history too)
+        unusual_activity = detect_unusual_activity(stock_info, historical if have_hist else None)
         
         # Risk Classification
-        risk_category = classify_stock_risk(stock_info)
+        try:
+            risk_category = _cached_risk_category(_field_items(stock_info, RISK_FIELDS))
+        except TypeError:
+            risk_category = classify_stock_risk(stock_info)
         
         # Calculate Risk-Adjusted Score
         risk_adjusted_score = self._calculate_risk_adjusted_score(
@@ -196,13 +376,7 @@ class AnalysisEngine:
         base_score = (technical_score + fundamental_score + sentiment_score) / 3
         
         # Adjust based on risk category
-        risk_adjustments = {
-            "conservative": 10,   # Bonus for low-risk stocks
-            "moderate": 0,
-            "aggressive": -10,    # Penalty for high-risk stocks
-        }
-        
-        score = base_score + risk_adjustments.get(risk_category, 0)
+        score = base_score + RISK_SCORE_ADJUSTMENTS.get(risk_category, 0)
         
         # Unusual activity can be a signal (positive or negative)
         for activity in unusual_activity:
@@ -228,11 +402,12 @@ class AnalysisEngine:
         """
         Calculate weighted combined score
         """
+        w_technical, w_fundamental, w_sentiment, w_risk = self._weight_vec
         combined = (
-            technical_score * self.weights["technical"] +
-            fundamental_score * self.weights["fundamental"] +
-            sentiment_score * self.weights["sentiment"] +
-            risk_adjusted_score * self.weights["risk_adjusted"]
+            technical_score * w_technical +
+            fundamental_score * w_fundamental +
+            sentiment_score * w_sentiment +
+            risk_adjusted_score * w_risk
         )
         
         return round(combined, 1)
@@ -282,7 +457,12 @@ class AnalysisEngine:
         
         # Add key technical signals
         tech_signals = technical.get("signals", [])
-        important_signals = [s[1] for s in tech_signals if "bullish" in s[1].lower() or "bearish" in s[1].lower()][:2]
+        important_signals = islice(
+            (signal for _, signal in tech_signals
+             for lowered in (signal.lower(),)
+             if "bullish" in lowered or "bearish" in lowered),
+            2
+        )
         reasons.extend(important_signals)
         
         # Fundamental reasoning
@@ -295,7 +475,8 @@ class AnalysisEngine:
         # Add key fundamental points
         fund_signals = fundamental.get("signals", [])
         for category, signal in fund_signals[:2]:
-            if "growth" in signal.lower() or "margin" in signal.lower():
+            lowered = signal.lower()
+            if "growth" in lowered or "margin" in lowered:
                 reasons.append(signal)
                 break
         
@@ -354,11 +535,7 @@ class AnalysisEngine:
             }
         
         # Position sizing based on risk category
-        max_position_pct = {
-            "conservative": 0.25,
-            "moderate": 0.15,
-            "aggressive": 0.10,
-        }.get(risk_category, 0.15)
+        max_position_pct = MAX_POSITION_PCT.get(risk_category, 0.15)
         
         max_position_value_chf = portfolio_value_chf * max_position_pct
         
@@ -391,11 +568,7 @@ class AnalysisEngine:
             
             if shares_to_buy > 0:
                 # Calculate stop loss
-                stop_loss_pct = {
-                    "conservative": 0.08,
-                    "moderate": 0.12,
-                    "aggressive": 0.18,
-                }.get(risk_category, 0.12)
+                stop_loss_pct = STOP_LOSS_PCT.get(risk_category, 0.12)
                 
                 stop_loss_price = current_price * (1 - stop_loss_pct)
                 
@@ -452,29 +625,12 @@ class AnalysisEngine:
         """
         if volatility_index is not None:
             if volatility_index > 30:
-                # High volatility - weight technical more
-                self.weights = {
-                    "technical": 0.50,
-                    "fundamental": 0.25,
-                    "sentiment": 0.15,
-                    "risk_adjusted": 0.10,
-                }
+                self._set_weights(WEIGHTS_HIGH_VOLATILITY)
             elif volatility_index < 15:
-                # Low volatility - weight fundamentals more
-                self.weights = {
-                    "technical": 0.30,
-                    "fundamental": 0.45,
-                    "sentiment": 0.15,
-                    "risk_adjusted": 0.10,
-                }
+                self._set_weights(WEIGHTS_LOW_VOLATILITY)
             else:
                 # Normal conditions - use default weights
-                self.weights = {
-                    "technical": 0.40,
-                    "fundamental": 0.35,
-                    "sentiment": 0.15,
-                    "risk_adjusted": 0.10,
-                }
+                self._set_weights(WEIGHTS_NORMAL)
 
 
 # Singleton instance
@@ -1,293 +1,413 @@
 """
 Fundamental analysis module
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Mapping, Tuple
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from operator import itemgetter
 import logging
+import re
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# stock_info fields read by the fundamental scorers (column order for the batch path)
+_FUND_KEYS = (
+    "pe_ratio", "forward_pe", "peg_ratio", "price_to_book",
+    "earnings_growth", "revenue_growth",
+    "profit_margin", "operating_margin", "free_cash_flow",
+    "debt_to_equity", "current_ratio", "total_cash", "total_debt",
+    "recommendation", "target_price", "current_price",
+)
+_get_fund_keys = itemgetter(*_FUND_KEYS)
+
+# Below this many populated fields a stock is scored neutral
+MIN_FUNDAMENTAL_FIELDS = 3
+
+# Score categories, shared by every signal tuple and component key
+_VALUATION = "valuation"
+_GROWTH = "growth"
+_PROFITABILITY = "profitability"
+_FINANCIAL_HEALTH = "financial_health"
+_ANALYST_SENTIMENT = "analyst_sentiment"
+_CATEGORIES = (_VALUATION, _GROWTH, _PROFITABILITY, _FINANCIAL_HEALTH, _ANALYST_SENTIMENT)
+
+# Category weights, in _CATEGORIES order
+_FUND_WEIGHTS = (0.30, 0.25, 0.20, 0.15, 0.10)
+
+# Sectors that are typically more / less volatile (matched as substrings)
+_AGGRESSIVE_SECTOR_RE = re.compile("|".join(map(re.escape, [
+    "technology", "biotechnology", "cryptocurrency", "cannabis",
+])))
+_CONSERVATIVE_SECTOR_RE = re.compile("|".join(map(re.escape, [
+    "utilities", "consumer defensive", "healthcare",
+])))
+
+# Score ladders: (side, thresholds, deltas, messages). "right" ladders mirror
+# a `value < t` cascade, "left" ladders a `value > t` cascade; thresholds are
+# ascending and deltas[i]/messages[i] apply to values falling in bin i
+_PE_LADDER = ("right", (0, 15, 25, 40), (-15, 15, 5, -5, -15), (
+    "Negative P/E ({:.1f}) - company unprofitable",
+    "Low P/E ({:.1f}) - potentially undervalued",
+    "Moderate P/E ({:.1f}) - fair valuation",
+    "High P/E ({:.1f}) - growth expectations priced in",
+    "Very high P/E ({:.1f}) - potentially overvalued",
+))
+_EARNINGS_GROWTH_LADDER = ("left", (-10, 0, 10, 25), (-15, -5, 5, 10, 20), (
+    "Significant earnings decline ({:.1f}%)",
+    "Slight earnings decline ({:.1f}%)",
+    "Positive earnings growth ({:.1f}%)",
+    "Solid earnings growth ({:.1f}%)",
+    "Strong earnings growth ({:.1f}%)",
+))
+_REVENUE_GROWTH_LADDER = ("left", (0, 10, 20), (-10, 5, 10, 15), (
+    "Revenue decline ({:.1f}%)",
+    "Positive revenue growth ({:.1f}%)",
+    "Solid revenue growth ({:.1f}%)",
+    "Strong revenue growth ({:.1f}%)",
+))
+_PROFIT_MARGIN_LADDER = ("left", (0, 10, 20), (-15, 5, 10, 15), (
+    "Negative profit margin ({:.1f}%)",
+    "Positive profit margin ({:.1f}%)",
+    "Solid profit margin ({:.1f}%)",
+    "High profit margin ({:.1f}%)",
+))
+_DEBT_TO_EQUITY_LADDER = ("right", (30, 100, 200), (15, 5, -5, -15), (
+    "Low debt-to-equity ({:.1f}%) - strong balance sheet",
+    "Moderate debt-to-equity ({:.1f}%)",
+    "High debt-to-equity ({:.1f}%)",
+    "Very high debt ({:.1f}%) - leverage risk",
+))
+_CURRENT_RATIO_LADDER = ("left", (1, 2), (-15, 5, 10), (
+    "Low current ratio ({:.2f}) - liquidity concern",
+    "Adequate current ratio ({:.2f})",
+    "Strong current ratio ({:.2f}) - good liquidity",
+))
+_CASH_DEBT_LADDER = ("left", (0.5, 1), (0, 5, 10), (
+    None,
+    "Adequate cash relative to debt",
+    "Cash exceeds total debt - strong position",
+))
+_RECOMMENDATION_LADDER = ("right", (2, 2.5, 3.5, 4.5), (25, 15, 0, -15, -25), (
+    "Strong analyst buy rating ({:.2f})",
+    "Analyst buy rating ({:.2f})",
+    "Analyst hold rating ({:.2f})",
+    "Analyst sell rating ({:.2f})",
+    "Strong analyst sell rating ({:.2f})",
+))
+_UPSIDE_LADDER = ("left", (-10, 10, 30), (-15, 0, 10, 15), (
+    "Trading above target ({:.1f}%)",
+    "Near analyst target ({:.1f}%)",
+    "Positive upside to target ({:.1f}%)",
+    "Significant upside to target ({:.1f}%)",
+))
+
+
+def _score_ladder(value: float, ladder: tuple) -> Tuple[int, Optional[str]]:
+    """Look up the score delta and signal message for a metric value"""
+    side, thresholds, deltas, messages = ladder
+    i = bisect_right(thresholds, value) if side == "right" else bisect_left(thresholds, value)
+    message = messages[i]
+    return deltas[i], message.format(value) if message else None
+
 
 def get_fundamental_score(stock_info: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calculate fundamental score (0-100) based on financial metrics
     
+    Thinly covered stocks with fewer than MIN_FUNDAMENTAL_FIELDS metrics
+    available get a neutral 50 and a single "Insufficient fundamental data"
+    signal.
+    
     Args:
         stock_info: Dict from market_data.get_stock_info()
     
     Returns:
         Dict with score and detailed breakdown
     """
+    try:
+        values = _get_fund_keys(stock_info)
+    except KeyError:
+        # Limited-data info dicts lack most fields
+        values = tuple(stock_info.get(key) for key in _FUND_KEYS)
+    
+    (pe_ratio, forward_pe, peg_ratio, price_to_book,
+     earnings_growth, revenue_growth,
+     profit_margin, operating_margin, free_cash_flow,
+     debt_to_equity, current_ratio, total_cash, total_debt,
+     recommendation, target_price, current_price) = values
+    
+    key_metrics = {
+        "pe_ratio": pe_ratio,
+        "forward_pe": forward_pe,
+        "peg_ratio": peg_ratio,
+        "profit_margin": profit_margin,
+        "debt_to_equity": debt_to_equity,
+        "current_ratio": current_ratio,
+        "earnings_growth": earnings_growth,
+        "revenue_growth": revenue_growth,
+    }
+    
+    # Too little data to say anything meaningful - stay neutral
+    if sum(value is not None for value in values) < MIN_FUNDAMENTAL_FIELDS:
+        return {
+            "score": 50.0,
+            "components": dict.fromkeys(_CATEGORIES, 50),
+            "signals": [("meta", "Insufficient fundamental data")],
+            "key_metrics": key_metrics,
+        }
+    
     signals = []
-    scores = []
     
     # 1. Valuation Score (30% weight)
     valuation_score = 50
-    valuation_signals = []
     
     # P/E Ratio
-    pe_ratio = stock_info.get("pe_ratio")
-    forward_pe = stock_info.get("forward_pe")
-    
     if pe_ratio is not None:
-        if pe_ratio < 0:
-            valuation_score -= 15
-            valuation_signals.append(f"Negative P/E ({pe_ratio:.1f}) - company unprofitable")
-        elif pe_ratio < 15:
-            valuation_score += 15
-            valuation_signals.append(f"Low P/E ({pe_ratio:.1f}) - potentially undervalued")
-        elif pe_ratio < 25:
-            valuation_score += 5
-            valuation_signals.append(f"Moderate P/E ({pe_ratio:.1f}) - fair valuation")
-        elif pe_ratio < 40:
-            valuation_score -= 5
-            valuation_signals.append(f"High P/E ({pe_ratio:.1f}) - growth expectations priced in")
-        else:
-            valuation_score -= 15
-            valuation_signals.append(f"Very high P/E ({pe_ratio:.1f}) - potentially overvalued")
+        delta, message = _score_ladder(pe_ratio, _PE_LADDER)
+        valuation_score += delta
+        signals.append((_VALUATION, message))
     
     # Forward P/E vs Trailing P/E (earnings growth expectation)
     if pe_ratio is not None and forward_pe is not None and pe_ratio > 0 and forward_pe > 0:
         if forward_pe < pe_ratio * 0.85:
             valuation_score += 10
-            valuation_signals.append("Forward P/E significantly lower - strong earnings growth expected")
+            signals.append((_VALUATION, "Forward P/E significantly lower - strong earnings growth expected"))
         elif forward_pe > pe_ratio * 1.15:
             valuation_score -= 10
-            valuation_signals.append("Forward P/E higher - earnings decline expected")
+            signals.append((_VALUATION, "Forward P/E higher - earnings decline expected"))
     
     # PEG Ratio
-    peg_ratio = stock_info.get("peg_ratio")
     if peg_ratio is not None and peg_ratio > 0:
         if peg_ratio < 1:
             valuation_score += 10
-            valuation_signals.append(f"PEG ratio below 1 ({peg_ratio:.2f}) - undervalued relative to growth")
+            signals.append((_VALUATION, f"PEG ratio below 1 ({peg_ratio:.2f}) - undervalued relative to growth"))
         elif peg_ratio > 2:
             valuation_score -= 10
-            valuation_signals.append(f"PEG ratio above 2 ({peg_ratio:.2f}) - expensive relative to growth")
+            signals.append((_VALUATION, f"PEG ratio above 2 ({peg_ratio:.2f}) - expensive relative to growth"))
     
     # Price to Book
-    price_to_book = stock_info.get("price_to_book")
     if price_to_book is not None:
         if price_to_book < 1:
             valuation_score += 10
-            valuation_signals.append(f"P/B below 1 ({price_to_book:.2f}) - trading below book value")
+            signals.append((_VALUATION, f"P/B below 1 ({price_to_book:.2f}) - trading below book value"))
         elif price_to_book > 10:
             valuation_score -= 5
-            valuation_signals.append(f"High P/B ({price_to_book:.2f}) - premium valuation")
-    
-    valuation_score = max(0, min(100, valuation_score))
-    scores.append(("valuation", valuation_score, 0.30))
-    signals.extend([("valuation", s) for s in valuation_signals])
+            signals.append((_VALUATION, f"High P/B ({price_to_book:.2f}) - premium valuation"))
     
     # 2. Growth Score (25% weight)
     growth_score = 50
-    growth_signals = []
     
     # Earnings Growth
-    earnings_growth = stock_info.get("earnings_growth")
     if earnings_growth is not None:
-        eg_pct = earnings_growth * 100
-        if eg_pct > 25:
-            growth_score += 20
-            growth_signals.append(f"Strong earnings growth ({eg_pct:.1f}%)")
-        elif eg_pct > 10:
-            growth_score += 10
-            growth_signals.append(f"Solid earnings growth ({eg_pct:.1f}%)")
-        elif eg_pct > 0:
-            growth_score += 5
-            growth_signals.append(f"Positive earnings growth ({eg_pct:.1f}%)")
-        elif eg_pct > -10:
-            growth_score -= 5
-            growth_signals.append(f"Slight earnings decline ({eg_pct:.1f}%)")
-        else:
-            growth_score -= 15
-            growth_signals.append(f"Significant earnings decline ({eg_pct:.1f}%)")
+        delta, message = _score_ladder(earnings_growth * 100, _EARNINGS_GROWTH_LADDER)
+        growth_score += delta
+        signals.append((_GROWTH, message))
     
     # Revenue Growth
-    revenue_growth = stock_info.get("revenue_growth")
     if revenue_growth is not None:
-        rg_pct = revenue_growth * 100
-        if rg_pct > 20:
-            growth_score += 15
-            growth_signals.append(f"Strong revenue growth ({rg_pct:.1f}%)")
-        elif rg_pct > 10:
-            growth_score += 10
-            growth_signals.append(f"Solid revenue growth ({rg_pct:.1f}%)")
-        elif rg_pct > 0:
-            growth_score += 5
-            growth_signals.append(f"Positive revenue growth ({rg_pct:.1f}%)")
-        else:
-            growth_score -= 10
-            growth_signals.append(f"Revenue decline ({rg_pct:.1f}%)")
-    
-    growth_score = max(0, min(100, growth_score))
-    scores.append(("growth", growth_score, 0.25))
-    signals.extend([("growth", s) for s in growth_signals])
+        delta, message = _score_ladder(revenue_growth * 100, _REVENUE_GROWTH_LADDER)
+        growth_score += delta
+        signals.append((_GROWTH, message))
     
     # 3. Profitability Score (20% weight)
     profitability_score = 50
-    profitability_signals = []
     
     # Profit Margin
-    profit_margin = stock_info.get("profit_margin")
     if profit_margin is not None:
-        pm_pct = profit_margin * 100
-        if pm_pct > 20:
-            profitability_score += 15
-            profitability_signals.append(f"High profit margin ({pm_pct:.1f}%)")
-        elif pm_pct > 10:
-            profitability_score += 10
-            profitability_signals.append(f"Solid profit margin ({pm_pct:.1f}%)")
-        elif pm_pct > 0:
-            profitability_score += 5
-            profitability_signals.append(f"Positive profit margin ({pm_pct:.1f}%)")
-        else:
-            profitability_score -= 15
-            profitability_signals.append(f"Negative profit margin ({pm_pct:.1f}%)")
+        delta, message = _score_ladder(profit_margin * 100, _PROFIT_MARGIN_LADDER)
+        profitability_score += delta
+        signals.append((_PROFITABILITY, message))
     
     # Operating Margin
-    operating_margin = stock_info.get("operating_margin")
     if operating_margin is not None:
         om_pct = operating_margin * 100
         if om_pct > 25:
             profitability_score += 10
-            profitability_signals.append(f"Excellent operating margin ({om_pct:.1f}%)")
+            signals.append((_PROFITABILITY, f"Excellent operating margin ({om_pct:.1f}%)"))
         elif om_pct > 15:
             profitability_score += 5
-            profitability_signals.append(f"Good operating margin ({om_pct:.1f}%)")
+            signals.append((_PROFITABILITY, f"Good operating margin ({om_pct:.1f}%)"))
         elif om_pct < 0:
             profitability_score -= 10
-            profitability_signals.append(f"Negative operating margin ({om_pct:.1f}%)")
+            signals.append((_PROFITABILITY, f"Negative operating margin ({om_pct:.1f}%)"))
     
     # Free Cash Flow
-    free_cash_flow = stock_info.get("free_cash_flow")
     if free_cash_flow is not None:
         if free_cash_flow > 0:
             profitability_score += 10
-            profitability_signals.append("Positive free cash flow")
+            signals.append((_PROFITABILITY, "Positive free cash flow"))
         else:
             profitability_score -= 10
-            profitability_signals.append("Negative free cash flow")
-    
-    profitability_score = max(0, min(100, profitability_score))
-    scores.append(("profitability", profitability_score, 0.20))
-    signals.extend([("profitability", s) for s in profitability_signals])
+            signals.append((_PROFITABILITY, "Negative free cash flow"))
     
     # 4. Financial Health Score (15% weight)
     health_score = 50
-    health_signals = []
     
     # Debt to Equity
-    debt_to_equity = stock_info.get("debt_to_equity")
     if debt_to_equity is not None:
-        if debt_to_equity < 30:
-            health_score += 15
-            health_signals.append(f"Low debt-to-equity ({debt_to_equity:.1f}%) - strong balance sheet")
-        elif debt_to_equity < 100:
-            health_score += 5
-            health_signals.append(f"Moderate debt-to-equity ({debt_to_equity:.1f}%)")
-        elif debt_to_equity < 200:
-            health_score -= 5
-            health_signals.append(f"High debt-to-equity ({debt_to_equity:.1f}%)")
-        else:
-            health_score -= 15
-            health_signals.append(f"Very high debt ({debt_to_equity:.1f}%) - leverage risk")
+        delta, message = _score_ladder(debt_to_equity, _DEBT_TO_EQUITY_LADDER)
+        health_score += delta
+        signals.append((_FINANCIAL_HEALTH, message))
     
     # Current Ratio
-    current_ratio = stock_info.get("current_ratio")
     if current_ratio is not None:
-        if current_ratio > 2:
-            health_score += 10
-            health_signals.append(f"Strong current ratio ({current_ratio:.2f}) - good liquidity")
-        elif current_ratio > 1:
-            health_score += 5
-            health_signals.append(f"Adequate current ratio ({current_ratio:.2f})")
-        else:
-            health_score -= 15
-            health_signals.append(f"Low current ratio ({current_ratio:.2f}) - liquidity concern")
+        delta, message = _score_ladder(current_ratio, _CURRENT_RATIO_LADDER)
+        health_score += delta
+        signals.append((_FINANCIAL_HEALTH, message))
     
     # Total Cash vs Debt
-    total_cash = stock_info.get("total_cash")
-    total_debt = stock_info.get("total_debt")
     if total_cash is not None and total_debt is not None and total_debt > 0:
-        cash_debt_ratio = total_cash / total_debt
-        if cash_debt_ratio > 1:
-            health_score += 10
-            health_signals.append("Cash exceeds total debt - strong position")
-        elif cash_debt_ratio > 0.5:
-            health_score += 5
-            health_signals.append("Adequate cash relative to debt")
-    
-    health_score = max(0, min(100, health_score))
-    scores.append(("financial_health", health_score, 0.15))
-    signals.extend([("financial_health", s) for s in health_signals])
+        delta, message = _score_ladder(total_cash / total_debt, _CASH_DEBT_LADDER)
+        if message:
+            health_score += delta
+            signals.append((_FINANCIAL_HEALTH, message))
     
     # 5. Analyst Sentiment Score (10% weight)
     analyst_score = 50
-    analyst_signals = []
     
     # Analyst Recommendation (1-5 scale: 1=strong buy, 5=strong sell)
-    recommendation = stock_info.get("recommendation")
-    recommendation_key = stock_info.get("recommendation_key")
-    
     if recommendation is not None:
-        if recommendation < 2:
-            analyst_score += 25
-            analyst_signals.append(f"Strong analyst buy rating ({recommendation:.2f})")
-        elif recommendation < 2.5:
-            analyst_score += 15
-            analyst_signals.append(f"Analyst buy rating ({recommendation:.2f})")
-        elif recommendation < 3.5:
-            analyst_score += 0
-            analyst_signals.append(f"Analyst hold rating ({recommendation:.2f})")
-        elif recommendation < 4.5:
-            analyst_score -= 15
-            analyst_signals.append(f"Analyst sell rating ({recommendation:.2f})")
-        else:
-            analyst_score -= 25
-            analyst_signals.append(f"Strong analyst sell rating ({recommendation:.2f})")
+        delta, message = _score_ladder(recommendation, _RECOMMENDATION_LADDER)
+        analyst_score += delta
+        signals.append((_ANALYST_SENTIMENT, message))
     
     # Price Target vs Current
-    target_price = stock_info.get("target_price")
-    current_price = stock_info.get("current_price")
-    
     if target_price is not None and current_price is not None and current_price > 0:
         upside = ((target_price - current_price) / current_price) * 100
-        if upside > 30:
-            analyst_score += 15
-            analyst_signals.append(f"Significant upside to target ({upside:.1f}%)")
-        elif upside > 10:
-            analyst_score += 10
-            analyst_signals.append(f"Positive upside to target ({upside:.1f}%)")
-        elif upside > -10:
-            analyst_signals.append(f"Near analyst target ({upside:.1f}%)")
-        else:
-            analyst_score -= 15
-            analyst_signals.append(f"Trading above target ({upside:.1f}%)")
-    
-    analyst_score = max(0, min(100, analyst_score))
-    scores.append(("analyst_sentiment", analyst_score, 0.10))
-    signals.extend([("analyst_sentiment", s) for s in analyst_signals])
+        delta, message = _score_ladder(upside, _UPSIDE_LADDER)
+        analyst_score += delta
+        signals.append((_ANALYST_SENTIMENT, message))
     
-    # Calculate weighted final score
-    final_score = sum(score * weight for _, score, weight in scores)
+    # Clamp every category to 0-100 in one pass, then weight them. Summed
+    # left to right on purpose: a dot product can round differently and
+    # flip round(score, 1) at .x5 boundaries
+    components = np.array([valuation_score, growth_score, profitability_score, health_score, analyst_score])
+    np.clip(components, 0, 100, out=components)
+    final_score = sum(score * weight for score, weight in zip(components.tolist(), _FUND_WEIGHTS))
     
     return {
         "score": round(final_score, 1),
-        "components": {name: score for name, score, _ in scores},
+        "components": dict(zip(_CATEGORIES, components.tolist())),
         "signals": signals,
-        "key_metrics": {
-            "pe_ratio": pe_ratio,
-            "forward_pe": forward_pe,
-            "peg_ratio": peg_ratio,
-            "profit_margin": profit_margin,
-            "debt_to_equity": debt_to_equity,
-            "current_ratio": current_ratio,
-            "earnings_growth": earnings_growth,
-            "revenue_growth": revenue_growth,
-        }
+        "key_metrics": key_metrics,
     }
 
 
+def _ladder(values: np.ndarray, ladder: tuple) -> np.ndarray:
+    """Vectorized _score_ladder delta lookup; missing (NaN) values score 0"""
+    side, thresholds, deltas, _ = ladder
+    bins = np.searchsorted(thresholds, values, side=side)
+    return np.where(np.isnan(values), 0, np.take(deltas, bins))
+
+
+def get_fundamental_scores_batch(infos: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Calculate fundamental scores for many stocks at once
+    
+    Vectorized equivalent of get_fundamental_score()["score"] for scoring a
+    whole watchlist; no signals are produced.
+    
+    Args:
+        infos: List of dicts from market_data.get_stock_info()
+    
+    Returns:
+        Array of scores (0-100), one per input
+    """
+    if not infos:
+        return np.empty(0)
+    
+    data = np.array([[info.get(key) for key in _FUND_KEYS] for info in infos], dtype=float)
+    scores, _ = get_fundamental_scores_columnar(dict(zip(_FUND_KEYS, data.T)))
+    return scores
+
+
+def get_fundamental_scores_columnar(
+    columns: Mapping[str, Any]
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Calculate fundamental scores from column-oriented data
+    
+    Args:
+        columns: Mapping (or DataFrame) from stock_info field name to a 1-D
+            array of values, one per stock. Absent fields and None/NaN
+            entries count as missing.
+    
+    Returns:
+        Tuple of (score array, dict of component score arrays)
+    """
+    first = next(iter(columns), None)
+    n = len(columns[first]) if first is not None else 0
+    
+    # Missing values become NaN, and every comparison against NaN is False
+    def column(key: str) -> np.ndarray:
+        if key in columns:
+            return np.asarray(columns[key], dtype=float)
+        return np.full(n, np.nan)
+    
+    data = [column(key) for key in _FUND_KEYS]
+    (pe_ratio, forward_pe, peg_ratio, price_to_book,
+     earnings_growth, revenue_growth,
+     profit_margin, operating_margin, free_cash_flow,
+     debt_to_equity, current_ratio, total_cash, total_debt,
+     recommendation, target_price, current_price) = data
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1. Valuation
+        valuation = 50 + _ladder(pe_ratio, _PE_LADDER)
+        positive_pe = (pe_ratio > 0) & (forward_pe > 0)
+        valuation += np.select(
+            [positive_pe & (forward_pe < pe_ratio * 0.85), positive_pe & (forward_pe > pe_ratio * 1.15)],
+            [10, -10]
+        )
+        valuation += np.select([(peg_ratio > 0) & (peg_ratio < 1), peg_ratio > 2], [10, -10])
+        valuation += np.select([price_to_book < 1, price_to_book > 10], [10, -5])
+        
+        # 2. Growth
+        growth = (
+            50
+            + _ladder(earnings_growth * 100, _EARNINGS_GROWTH_LADDER)
+            + _ladder(revenue_growth * 100, _REVENUE_GROWTH_LADDER)
+        )
+        
+        # 3. Profitability
+        om_pct = operating_margin * 100
+        profitability = (
+            50
+            + _ladder(profit_margin * 100, _PROFIT_MARGIN_LADDER)
+            + np.select([om_pct > 25, om_pct > 15, om_pct < 0], [10, 5, -10])
+            + np.select([free_cash_flow > 0, free_cash_flow <= 0], [10, -10])
+        )
+        
+        # 4. Financial health
+        cash_debt_ratio = np.where(total_debt > 0, total_cash / total_debt, np.nan)
+        health = (
+            50
+            + _ladder(debt_to_equity, _DEBT_TO_EQUITY_LADDER)
+            + _ladder(current_ratio, _CURRENT_RATIO_LADDER)
+            + _ladder(cash_debt_ratio, _CASH_DEBT_LADDER)
+        )
+        
+        # 5. Analyst sentiment
+        upside = np.where(current_price > 0, (target_price - current_price) / current_price * 100, np.nan)
+        analyst = (
+            50
+            + _ladder(recommendation, _RECOMMENDATION_LADDER)
+            + _ladder(upside, _UPSIDE_LADDER)
+        )
+    
+    components = np.clip(np.column_stack([valuation, growth, profitability, health, analyst]), 0, 100)
+    
+    # Same neutral fallback as get_fundamental_score for thinly covered stocks
+    sparse = (~np.isnan(np.column_stack(data))).sum(axis=1) < MIN_FUNDAMENTAL_FIELDS
+    components[sparse] = 50
+    
+    # Left-to-right like get_fundamental_score, so both round the same way
+    scores = np.round(sum(components[:, i] * weight for i, weight in enumerate(_FUND_WEIGHTS)), 1)
+    return scores, dict(zip(_CATEGORIES, components.T))
+
+
 def classify_stock_risk(stock_info: Dict[str, Any]) -> str:
     """
     Classify a stock's risk level based on fundamentals
@@ -297,10 +417,10 @@ def classify_stock_risk(stock_info: Dict[str, Any]) -> str:
     market_cap = stock_info.get("market_cap")
     beta = stock_info.get("beta")
     sector = stock_info.get("sector", "").lower()
-    exchange = stock_info.get("exchange", "")
+    exchange = stock_info.get("exchange", "").lower()
     
     # Junior exchanges are aggressive
-    if "venture" in exchange.lower() or "-v" in exchange.lower():
+    if "venture" in exchange or "-v" in exchange:
         return "aggressive"
     
     # Very small caps are aggressive
@@ -318,65 +438,59 @@ def classify_stock_risk(stock_info: Dict[str, Any]) -> str:
             return "moderate"
     
     # Certain sectors are typically more volatile
-    aggressive_sectors = ["technology", "biotechnology", "cryptocurrency", "cannabis"]
-    conservative_sectors = ["utilities", "consumer defensive", "healthcare"]
+    if _AGGRESSIVE_SECTOR_RE.search(sector):
+        return "aggressive" if market_cap and market_cap < 10_000_000_000 else "moderate"
     
-    for s in aggressive_sectors:
-        if s in sector:
-            return "aggressive" if market_cap and market_cap < 10_000_000_000 else "moderate"
-    
-    for s in conservative_sectors:
-        if s in sector:
-            return "conservative"
+    if _CONSERVATIVE_SECTOR_RE.search(sector):
+        return "conservative"
     
     # Default to moderate
     return "moderate"
 
 
+# Simplified sector averages (in production, fetch from API)
+_SECTOR_AVG = {
+    "Technology": {"pe": 30, "profit_margin": 0.15, "debt_to_equity": 50},
+    "Healthcare": {"pe": 25, "profit_margin": 0.12, "debt_to_equity": 60},
+    "Financial": {"pe": 12, "profit_margin": 0.20, "debt_to_equity": 150},
+    "Consumer Cyclical": {"pe": 20, "profit_margin": 0.08, "debt_to_equity": 80},
+    "Basic Materials": {"pe": 15, "profit_margin": 0.10, "debt_to_equity": 40},
+    "Energy": {"pe": 12, "profit_margin": 0.08, "debt_to_equity": 50},
+    "default": {"pe": 20, "profit_margin": 0.10, "debt_to_equity": 70},
+}
+
+
+@lru_cache(maxsize=1024, typed=True)
+def _compare_one(stock_value: float, sector_avg: float) -> Dict[str, float]:
+    """Compare one metric to its sector average (callers must copy the result)"""
+    return {
+        "stock": stock_value,
+        "sector_avg": sector_avg,
+        "difference_pct": ((stock_value - sector_avg) / sector_avg) * 100 if sector_avg else 0
+    }
+
+
 def get_sector_comparison(stock_info: Dict[str, Any], sector_data: Optional[Dict] = None) -> Dict[str, Any]:
     """
     Compare stock metrics to sector averages
     
     Note: sector_data would come from an external source in production
     """
-    # Simplified sector averages (in production, fetch from API)
-    sector_averages = {
-        "Technology": {"pe": 30, "profit_margin": 0.15, "debt_to_equity": 50},
-        "Healthcare": {"pe": 25, "profit_margin": 0.12, "debt_to_equity": 60},
-        "Financial": {"pe": 12, "profit_margin": 0.20, "debt_to_equity": 150},
-        "Consumer Cyclical": {"pe": 20, "profit_margin": 0.08, "debt_to_equity": 80},
-        "Basic Materials": {"pe": 15, "profit_margin": 0.10, "debt_to_equity": 40},
-        "Energy": {"pe": 12, "profit_margin": 0.08, "debt_to_equity": 50},
-        "default": {"pe": 20, "profit_margin": 0.10, "debt_to_equity": 70},
-    }
-    
     sector = stock_info.get("sector", "default")
-    averages = sector_averages.get(sector, sector_averages["default"])
+    averages = _SECTOR_AVG.get(sector, _SECTOR_AVG["default"])
     
     comparisons = {}
     
     pe_ratio = stock_info.get("pe_ratio")
     if pe_ratio is not None and pe_ratio > 0:
-        comparisons["pe_vs_sector"] = {
-            "stock": pe_ratio,
-            "sector_avg": averages["pe"],
-            "difference_pct": ((pe_ratio - averages["pe"]) / averages["pe"]) * 100
-        }
+        comparisons["pe_vs_sector"] = dict(_compare_one(pe_ratio, averages["pe"]))
     
     profit_margin = stock_info.get("profit_margin")
     if profit_margin is not None:
-        comparisons["margin_vs_sector"] = {
-            "stock": profit_margin,
-            "sector_avg": averages["profit_margin"],
-            "difference_pct": ((profit_margin - averages["profit_margin"]) / averages["profit_margin"]) * 100 if averages["profit_margin"] else 0
-        }
+        comparisons["margin_vs_sector"] = dict(_compare_one(profit_margin, averages["profit_margin"]))
     
     debt_to_equity = stock_info.get("debt_to_equity")
     if debt_to_equity is not None:
-        comparisons["debt_vs_sector"] = {
-            "stock": debt_to_equity,
-            "sector_avg": averages["debt_to_equity"],
-            "difference_pct": ((debt_to_equity - averages["debt_to_equity"]) / averages["debt_to_equity"]) * 100 if averages["debt_to_equity"] else 0
-        }
+        comparisons["debt_vs_sector"] = dict(_compare_one(debt_to_equity, averages["debt_to_equity"]))
     
     return comparisons
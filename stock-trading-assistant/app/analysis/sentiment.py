@@ -3,14 +3,38 @@ Sentiment analysis module for news and market sentiment
 """
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 import logging
 import re
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# stock_info fields read by detect_unusual_activity, fetched in one call
+_UNUSUAL_ACTIVITY_FIELDS = (
+    "avg_volume", "avg_volume_10d", "current_price", "open",
+    "previous_close", "52_week_high", "52_week_low",
+)
+_get_unusual_activity_fields = itemgetter(*_UNUSUAL_ACTIVITY_FIELDS)
+
+# Word tokenizer for headlines (\w+ runs are already word-bounded)
+_WORD_RE = re.compile(r'\w+')
+
+
+def _split_terms(terms):
+    """Split a term list into single words and multi-token phrases"""
+    words = frozenset(t for t in terms if _WORD_RE.fullmatch(t))
+    phrases = tuple(sorted(t for t in terms if t not in words))
+    return words, phrases
 
-# Simple sentiment word lists (in production, use NLP library or API)
-POSITIVE_WORDS = {
+
+# Simple sentiment word lists (in production, use NLP library or API).
+# Phrases can't be found by word intersection, so they are matched as
+# substrings of the headline instead.
+POSITIVE_WORDS, POSITIVE_PHRASES = _split_terms({
     "beat", "beats", "exceeded", "exceeds", "upgrade", "upgraded", "upgrades",
     "buy", "bullish", "outperform", "strong", "growth", "profit", "profitable",
     "surge", "surges", "surged", "soar", "soars", "soared", "rally", "rallies",
@@ -19,9 +43,9 @@ POSITIVE_WORDS = {
     "expand", "expansion", "innovative", "innovation", "partnership", "deal",
     "acquisition", "dividend", "buyback", "repurchase", "beat expectations",
     "above estimates", "raised guidance", "increased guidance", "momentum",
-}
+})
 
-NEGATIVE_WORDS = {
+NEGATIVE_WORDS, NEGATIVE_PHRASES = _split_terms({
     "miss", "missed", "misses", "downgrade", "downgraded", "downgrades",
     "sell", "bearish", "underperform", "weak", "weakness", "loss", "losses",
     "decline", "declines", "declined", "drop", "drops", "dropped", "fall",
@@ -31,17 +55,43 @@ NEGATIVE_WORDS = {
     "lawsuit", "investigation", "fraud", "scandal", "recall", "warning",
     "below estimates", "missed expectations", "lowered guidance", "cut",
     "concern", "concerns", "worried", "worry", "risk", "risks", "risky",
-}
+})
 
-VERY_POSITIVE_WORDS = {
+VERY_POSITIVE_WORDS, VERY_POSITIVE_PHRASES = _split_terms({
     "blockbuster", "blowout", "record-breaking", "all-time high",
     "massive growth", "extraordinary", "exceptional", "remarkable",
-}
+})
 
-VERY_NEGATIVE_WORDS = {
+VERY_NEGATIVE_WORDS, VERY_NEGATIVE_PHRASES = _split_terms({
     "bankrupt", "bankruptcy", "fraud", "criminal", "indicted",
     "collapse", "collapsed", "crisis", "disaster", "catastrophic",
-}
+})
+
+
+def _term_weights(weighted_terms):
+    """Sum per-term score deltas across the categories a term belongs to"""
+    weights = {}
+    for terms, weight in weighted_terms:
+        for term in terms:
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+# Score delta per word/phrase, so a headline is scored in a single pass
+_WORD_WEIGHTS = _term_weights([
+    (POSITIVE_WORDS, 8), (NEGATIVE_WORDS, -8),
+    (VERY_POSITIVE_WORDS, 15), (VERY_NEGATIVE_WORDS, -15),
+])
+_PHRASE_WEIGHTS = _term_weights([
+    (POSITIVE_PHRASES, 8), (NEGATIVE_PHRASES, -8),
+    (VERY_POSITIVE_PHRASES, 15), (VERY_NEGATIVE_PHRASES, -15),
+])
+
+# Every scored word, for filtering headline tokens in one C-level intersection
+_SENTIMENT_VOCAB = frozenset(_WORD_WEIGHTS)
+
+# All phrases in one alternation (longest first), so a headline is scanned once
+_PHRASE_RE = re.compile("|".join(map(re.escape, sorted(_PHRASE_WEIGHTS, key=len, reverse=True))))
 
 
 def analyze_news_sentiment(news_items: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -64,20 +114,19 @@ def analyze_news_sentiment(news_items: List[Dict[str, Any]]) -> Dict[str, Any]:
             "headlines": [],
         }
     
-    sentiments = []
-    analyzed_headlines = []
+    titles = [item.get("title", "") for item in news_items]
+    sentiments = [_analyze_lowercased(title.lower()) for title in titles]
     
-    for item in news_items:
-        title = item.get("title", "").lower()
-        sentiment_score = analyze_text_sentiment(title)
-        sentiments.append(sentiment_score)
-        
-        analyzed_headlines.append({
-            "title": item.get("title", ""),
+    # Only the first 5 are shown, so don't build display dicts for the rest
+    analyzed_headlines = [
+        {
+            "title": title,
             "sentiment_score": sentiment_score,
             "published": item.get("published"),
             "publisher": item.get("publisher", ""),
-        })
+        }
+        for item, title, sentiment_score in islice(zip(news_items, titles, sentiments), 5)
+    ]
     
     # Calculate average sentiment
     avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 50
@@ -104,7 +153,7 @@ def analyze_news_sentiment(news_items: List[Dict[str, Any]]) -> Dict[str, Any]:
         "news_count": len(news_items),
         "positive_count": positive_count,
         "negative_count": negative_count,
-        "headlines": analyzed_headlines[:5],  # Top 5 for display
+        "headlines": analyzed_headlines,  # Top 5 for display
     }
 
 
@@ -114,22 +163,21 @@ def analyze_text_sentiment(text: str) -> float:
     
     Returns score 0-100 (0=very negative, 50=neutral, 100=very positive)
     """
-    text = text.lower()
-    words = set(re.findall(r'\b\w+\b', text))
-    
-    # Count sentiment words
-    positive_count = len(words & POSITIVE_WORDS)
-    negative_count = len(words & NEGATIVE_WORDS)
-    very_positive = len(words & VERY_POSITIVE_WORDS)
-    very_negative = len(words & VERY_NEGATIVE_WORDS)
-    
-    # Calculate score
-    # Start at neutral (50), add/subtract based on word counts
-    score = 50
-    score += positive_count * 8
-    score -= negative_count * 8
-    score += very_positive * 15
-    score -= very_negative * 15
+    return _analyze_lowercased(text.lower())
+
+
+@lru_cache(maxsize=4096)
+def _analyze_lowercased(text: str) -> float:
+    """
+    Score already lower-cased text (see analyze_text_sentiment)
+    
+    Headlines recur across repeated analyses and across tickers, so scores
+    are memoized per text.
+    """
+    # Start at neutral (50), add/subtract for each distinct sentiment word
+    # and each phrase present
+    score = 50 + sum(_WORD_WEIGHTS[word] for word in _SENTIMENT_VOCAB.intersection(_WORD_RE.findall(text)))
+    score += sum(_PHRASE_WEIGHTS[phrase] for phrase in set(_PHRASE_RE.findall(text)))
     
     # Clamp to 0-100
     return max(0, min(100, score))
@@ -150,12 +198,10 @@ def get_sentiment_score(
         Dict with score and detailed breakdown
     """
     signals = []
-    scores = []
     
     # 1. News Sentiment (60% weight)
     news_analysis = analyze_news_sentiment(news_items)
     news_score = news_analysis["score"]
-    scores.append(("news", news_score, 0.60))
     
     if news_analysis["sentiment"] == "very_positive":
         signals.append(("news", "Very positive news sentiment"))
@@ -204,9 +250,6 @@ def get_sentiment_score(
             price_score += 10  # Could be oversold opportunity
             signals.append(("price", "Trading near 52-week low - potential value"))
     
-    price_score = max(0, min(100, price_score))
-    scores.append(("price_action", price_score, 0.25))
-    
     # 3. Volume Sentiment (15% weight)
     volume_score = 50
     
@@ -225,15 +268,15 @@ def get_sentiment_score(
             volume_score -= 10
             signals.append(("volume", "Declining volume - reduced interest"))
     
-    volume_score = max(0, min(100, volume_score))
-    scores.append(("volume", volume_score, 0.15))
+    # Clamp price and volume to 0-100 in one pass (news is already in range)
+    price_score, volume_score = np.clip([price_score, volume_score], 0, 100).tolist()
     
     # Calculate weighted final score
-    final_score = sum(score * weight for _, score, weight in scores)
+    final_score = news_score * 0.60 + price_score * 0.25 + volume_score * 0.15
     
     return {
         "score": round(final_score, 1),
-        "components": {name: score for name, score, _ in scores},
+        "components": {"news": news_score, "price_action": price_score, "volume": volume_score},
         "signals": signals,
         "news_analysis": news_analysis,
     }
@@ -250,10 +293,15 @@ def detect_unusual_activity(
     """
     unusual = []
     
-    # Volume spike
-    avg_volume = stock_info.get("avg_volume")
-    avg_volume_10d = stock_info.get("avg_volume_10d")
+    try:
+        (avg_volume, avg_volume_10d, current, open_price,
+         prev_close, week_52_high, week_52_low) = _get_unusual_activity_fields(stock_info)
+    except KeyError:
+        # Limited-data info dicts lack most fields
+        (avg_volume, avg_volume_10d, current, open_price,
+         prev_close, week_52_high, week_52_low) = (stock_info.get(key) for key in _UNUSUAL_ACTIVITY_FIELDS)
     
+    # Volume spike
     if avg_volume and avg_volume_10d:
         if avg_volume_10d > avg_volume * 2:
             unusual.append({
@@ -263,10 +311,6 @@ def detect_unusual_activity(
             })
     
     # Price gap
-    current = stock_info.get("current_price")
-    open_price = stock_info.get("open")
-    prev_close = stock_info.get("previous_close")
-    
     if open_price and prev_close:
         gap_pct = ((open_price - prev_close) / prev_close) * 100
         if abs(gap_pct) > 3:
@@ -278,19 +322,15 @@ def detect_unusual_activity(
             })
     
     # Near 52-week high/low
-    week_52_high = stock_info.get("52_week_high")
-    week_52_low = stock_info.get("52_week_low")
-    
-    if current and week_52_high:
-        if current >= week_52_high * 0.98:
+    if current:
+        if week_52_high and current >= week_52_high * 0.98:
             unusual.append({
                 "type": "52_week_high",
                 "description": "Trading at or near 52-week high",
                 "significance": "medium",
             })
-    
-    if current and week_52_low:
-        if current <= week_52_low * 1.02:
+        
+        if week_52_low and current <= week_52_low * 1.02:
             unusual.append({
                 "type": "52_week_low",
                 "description": "Trading at or near 52-week low",
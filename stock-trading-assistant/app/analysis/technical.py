@@ -3,12 +3,24 @@ Technical analysis module
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Mapping, Hashable
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 
+# Indicator frames keyed by a digest of the input frame, so re-analyzing an
+# unchanged history (dashboard refreshes, repeated screens) skips the math
+INDICATOR_CACHE_MAX_SIZE = 256
+_indicator_cache: Dict[Tuple, pd.DataFrame] = {}
+_indicator_cache_lock = threading.Lock()
+
+
 def calculate_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate all technical indicators on OHLCV data
@@ -19,98 +31,226 @@ def calculate_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with added indicator columns
     """
-    df = df.copy()
-    close = df["Close"]
-    high = df["High"]
-    low = df["Low"]
-    volume = df["Volume"]
-    
-    # Moving Averages
-    df["SMA_5"] = close.rolling(window=5).mean()
-    df["SMA_10"] = close.rolling(window=10).mean()
-    df["SMA_20"] = close.rolling(window=20).mean()
-    df["SMA_50"] = close.rolling(window=50).mean()
-    df["SMA_200"] = close.rolling(window=200).mean()
+    key = _frame_key(df)
+    with _indicator_cache_lock:
+        cached = _indicator_cache.get(key)
+    if cached is not None:
+        return cached.copy()
     
-    # Exponential Moving Averages
-    df["EMA_9"] = close.ewm(span=9, adjust=False).mean()
-    df["EMA_12"] = close.ewm(span=12, adjust=False).mean()
-    df["EMA_26"] = close.ewm(span=26, adjust=False).mean()
+    result = _compute_technical_indicators(df)
     
-    # MACD
-    df["MACD"] = df["EMA_12"] - df["EMA_26"]
-    df["MACD_Signal"] = df["MACD"].ewm(span=9, adjust=False).mean()
-    df["MACD_Histogram"] = df["MACD"] - df["MACD_Signal"]
+    with _indicator_cache_lock:
+        if key not in _indicator_cache and len(_indicator_cache) >= INDICATOR_CACHE_MAX_SIZE:
+            _indicator_cache.pop(next(iter(_indicator_cache)))
+        _indicator_cache[key] = result.copy()
     
-    # RSI
-    df["RSI"] = calculate_rsi(close, period=14)
-    
-    # Stochastic RSI
-    df["StochRSI"] = calculate_stoch_rsi(close, period=14)
-    
-    # Bollinger Bands
-    df["BB_Middle"] = close.rolling(window=20).mean()
-    bb_std = close.rolling(window=20).std()
-    df["BB_Upper"] = df["BB_Middle"] + (bb_std * 2)
-    df["BB_Lower"] = df["BB_Middle"] - (bb_std * 2)
-    df["BB_Width"] = (df["BB_Upper"] - df["BB_Lower"]) / df["BB_Middle"]
-    df["BB_Position"] = (close - df["BB_Lower"]) / (df["BB_Upper"] - df["BB_Lower"])
+    return result
+
+
+def _frame_key(df: pd.DataFrame) -> Tuple:
+    """Cache key covering a frame's columns, index and every value"""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16).digest()
+    return tuple(df.columns), len(df), digest
+
+
+def _compute_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """Calculate the indicator columns for calculate_technical_indicators()"""
+    # Convert the inputs to float64 once. pandas' rolling and ewm kernels
+    # compute in float64 whatever the input dtype, so integer volume or
+    # narrower price columns would otherwise be upcast again by every indicator
+    ohlcv = df[["High", "Low", "Close", "Volume"]].astype(np.float64)
+    close = ohlcv["Close"]
+    high = ohlcv["High"]
+    low = ohlcv["Low"]
+    volume = ohlcv["Volume"]
+    
+    # Close-only indicators
+    indicators = _close_indicators(close)
     
     # ATR (Average True Range)
-    df["ATR"] = calculate_atr(high, low, close, period=14)
+    indicators["ATR"] = calculate_atr(high, low, close, period=14)
     
     # ADX (Average Directional Index)
-    df["ADX"], df["DI_Plus"], df["DI_Minus"] = calculate_adx(high, low, close, period=14)
+    indicators["ADX"], indicators["DI_Plus"], indicators["DI_Minus"] = calculate_adx(high, low, close, period=14)
     
     # Volume indicators
-    df["Volume_SMA"] = volume.rolling(window=20).mean()
-    df["Volume_Ratio"] = volume / df["Volume_SMA"]
+    indicators["Volume_SMA"] = volume.rolling(window=20).mean()
+    indicators["Volume_Ratio"] = volume / indicators["Volume_SMA"]
     
     # OBV (On Balance Volume)
-    df["OBV"] = calculate_obv(close, volume)
+    indicators["OBV"] = calculate_obv(close, volume)
     
-    # Money Flow Index
-    df["MFI"] = calculate_mfi(high, low, close, volume, period=14)
+    # Typical price, shared by MFI and CCI
+    typical_price = (high + low + close) / 3
     
-    # Price Rate of Change
-    df["ROC_5"] = (close - close.shift(5)) / close.shift(5) * 100
-    df["ROC_10"] = (close - close.shift(10)) / close.shift(10) * 100
-    df["ROC_20"] = (close - close.shift(20)) / close.shift(20) * 100
+    # Money Flow Index
+    indicators["MFI"] = calculate_mfi(high, low, close, volume, period=14, typical_price=typical_price)
     
     # Williams %R
-    df["Williams_R"] = calculate_williams_r(high, low, close, period=14)
+    indicators["Williams_R"] = calculate_williams_r(high, low, close, period=14)
     
     # CCI (Commodity Channel Index)
-    df["CCI"] = calculate_cci(high, low, close, period=20)
+    indicators["CCI"] = calculate_cci(high, low, close, period=20, typical_price=typical_price)
+    
+    # Attach every column in one go rather than inserting them one at a time
+    return pd.concat([df, pd.DataFrame(indicators, index=df.index)], axis=1)
+
+
+def calculate_technical_indicators_batch(
+    frames: Mapping[Hashable, pd.DataFrame],
+    max_workers: int = 8
+) -> Dict[Hashable, pd.DataFrame]:
+    """
+    Calculate technical indicators for several symbols concurrently
+    
+    The rolling and ewm kernels release the GIL, so independent symbols
+    overlap on a thread pool.
+    
+    Args:
+        frames: Mapping of symbol key to OHLCV DataFrame
+        max_workers: Upper bound on worker threads
+    
+    Returns:
+        Dict mapping each key to its DataFrame with indicator columns
+    """
+    if not frames:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=min(len(frames), max_workers)) as executor:
+        futures = {key: executor.submit(calculate_technical_indicators, df) for key, df in frames.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+
+def _close_indicators(close: pd.Series) -> Dict[str, pd.Series]:
+    """
+    Calculate the indicators that only depend on Close
+    
+    Intermediate results (EMAs, RSI, the 20-day mean) are shared between
+    indicators instead of being recomputed.
+    """
+    indicators = {}
+    
+    # Moving Averages
+    indicators["SMA_5"] = close.rolling(window=5).mean()
+    indicators["SMA_10"] = close.rolling(window=10).mean()
+    window_20 = close.rolling(window=20)
+    sma_20 = window_20.mean()
+    indicators["SMA_20"] = sma_20
+    indicators["SMA_50"] = close.rolling(window=50).mean()
+    indicators["SMA_200"] = close.rolling(window=200).mean()
+    
+    # Exponential Moving Averages
+    indicators["EMA_9"] = close.ewm(span=9, adjust=False).mean()
+    
+    # MACD, including the EMA_12 / EMA_26 it is built from
+    (indicators["EMA_12"], indicators["EMA_26"], indicators["MACD"],
+     indicators["MACD_Signal"], indicators["MACD_Histogram"]) = calculate_macd(close)
+    
+    # RSI and Stochastic RSI from the same RSI series
+    rsi = calculate_rsi(close, period=14)
+    indicators["RSI"] = rsi
+    indicators["StochRSI"] = _stoch_from_rsi(rsi, period=14)
+    
+    # Bollinger Bands (the middle band is SMA_20)
+    bb_middle = sma_20
+    bb_std = window_20.std()
+    bb_upper = bb_middle + (bb_std * 2)
+    bb_lower = bb_middle - (bb_std * 2)
+    indicators["BB_Middle"] = bb_middle
+    indicators["BB_Upper"] = bb_upper
+    indicators["BB_Lower"] = bb_lower
+    bb_width = (bb_upper - bb_lower) / bb_middle
+    indicators["BB_Width"] = bb_width
+    indicators["BB_Width_20Mean"] = bb_width.rolling(window=20, min_periods=1).mean()
+    indicators["BB_Position"] = (close - bb_lower) / (bb_upper - bb_lower)
+    
+    # Price Rate of Change
+    for period in (5, 10, 20):
+        shifted = close.shift(period)
+        indicators[f"ROC_{period}"] = (close - shifted) / shifted * 100
+    
+    return indicators
+
+
+def calculate_macd(
+    close: pd.Series,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9
+) -> Tuple[pd.Series, pd.Series, pd.Series, pd.Series, pd.Series]:
+    """
+    Calculate MACD
     
-    return df
+    Returns:
+        Tuple of (fast EMA, slow EMA, MACD line, signal line, histogram)
+    """
+    ema_fast = close.ewm(span=fast, adjust=False).mean()
+    ema_slow = close.ewm(span=slow, adjust=False).mean()
+    macd = ema_fast - ema_slow
+    macd_signal = macd.ewm(span=signal, adjust=False).mean()
+    return ema_fast, ema_slow, macd, macd_signal, macd - macd_signal
 
 
 def calculate_rsi(close: pd.Series, period: int = 14) -> pd.Series:
-    """Calculate Relative Strength Index"""
-    delta = close.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    """Calculate Relative Strength Index (Wilder's smoothing)"""
+    delta = np.diff(close.to_numpy(dtype=np.float64), prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    
+    avg_gain = _wilder_average(gain, period)
+    avg_loss = _wilder_average(loss, period)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+    return pd.Series(rsi, index=close.index)
+
+
+def _wilder_average(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder's running average of values[1:]
     
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    Seeded with the simple mean of the first period values, then
+    avg = (prev * (period - 1) + value) / period, which is an EMA with
+    alpha = 1 / period started at the seed.
+    """
+    out = np.full(len(values), np.nan)
+    if len(values) <= period:
+        return out
+    
+    seeded = values[period:].copy()
+    seeded[0] = values[1:period + 1].mean()
+    out[period:] = pd.Series(seeded).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    return out
 
 
 def calculate_stoch_rsi(close: pd.Series, period: int = 14) -> pd.Series:
     """Calculate Stochastic RSI"""
     rsi = calculate_rsi(close, period)
-    stoch_rsi = (rsi - rsi.rolling(period).min()) / (rsi.rolling(period).max() - rsi.rolling(period).min())
+    return _stoch_from_rsi(rsi, period)
+
+
+def _stoch_from_rsi(rsi: pd.Series, period: int = 14) -> pd.Series:
+    """Scale an RSI series to its position within the rolling RSI range"""
+    rsi_min = rsi.rolling(period).min()
+    rsi_max = rsi.rolling(period).max()
+    stoch_rsi = (rsi - rsi_min) / (rsi_max - rsi_min)
     return stoch_rsi * 100
 
 
 def calculate_atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
     """Calculate Average True Range"""
-    tr1 = high - low
-    tr2 = abs(high - close.shift())
-    tr3 = abs(low - close.shift())
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
+    high_values = high.to_numpy(dtype=np.float64)
+    low_values = low.to_numpy(dtype=np.float64)
+    prev_close = close.shift().to_numpy(dtype=np.float64)
+    
+    # fmax skips NaN like DataFrame.max, so the first bar falls back to high - low
+    tr = np.fmax(
+        np.fmax(high_values - low_values, np.abs(high_values - prev_close)),
+        np.abs(low_values - prev_close),
+    )
+    atr = pd.Series(tr, index=high.index).rolling(window=period).mean()
     return atr
 
 
@@ -135,13 +275,30 @@ def calculate_adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int
 
 def calculate_obv(close: pd.Series, volume: pd.Series) -> pd.Series:
     """Calculate On Balance Volume"""
-    obv = (np.sign(close.diff()) * volume).cumsum()
-    return obv
+    close_values = close.to_numpy(dtype=np.float64)
+    volume_values = volume.to_numpy(dtype=np.float64)
+    
+    obv = np.full(len(close_values), np.nan)
+    if len(close_values) > 1:
+        signed_volume = np.sign(np.diff(close_values)) * volume_values[1:]
+        running = np.nancumsum(signed_volume)
+        # Gaps stay NaN like Series.cumsum, without resetting the running total
+        running[np.isnan(signed_volume)] = np.nan
+        obv[1:] = running
+    return pd.Series(obv, index=close.index)
 
 
-def calculate_mfi(high: pd.Series, low: pd.Series, close: pd.Series, volume: pd.Series, period: int = 14) -> pd.Series:
-    """Calculate Money Flow Index"""
-    typical_price = (high + low + close) / 3
+def calculate_mfi(
+    high: pd.Series,
+    low: pd.Series,
+    close: pd.Series,
+    volume: pd.Series,
+    period: int = 14,
+    typical_price: Optional[pd.Series] = None
+) -> pd.Series:
+    """Calculate Money Flow Index (typical_price may be passed in if already computed)"""
+    if typical_price is None:
+        typical_price = (high + low + close) / 3
     raw_money_flow = typical_price * volume
     
     money_flow_diff = typical_price.diff()
@@ -157,23 +314,106 @@ def calculate_mfi(high: pd.Series, low: pd.Series, close: pd.Series, volume: pd.
 
 def calculate_williams_r(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
     """Calculate Williams %R"""
-    highest_high = high.rolling(period).max()
-    lowest_low = low.rolling(period).min()
-    
-    williams_r = -100 * (highest_high - close) / (highest_high - lowest_low)
-    return williams_r
+    highest_high = high.rolling(period).max().to_numpy(dtype=np.float64)
+    lowest_low = low.rolling(period).min().to_numpy(dtype=np.float64)
+    
+    # A flat window has no range, so leave it NaN instead of dividing by zero
+    price_range = highest_high - lowest_low
+    williams_r = np.full(len(price_range), np.nan)
+    np.divide(-100 * (highest_high - close.to_numpy(dtype=np.float64)), price_range,
+              out=williams_r, where=price_range != 0)
+    return pd.Series(williams_r, index=close.index)
 
 
-def calculate_cci(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 20) -> pd.Series:
-    """Calculate Commodity Channel Index"""
-    typical_price = (high + low + close) / 3
+def calculate_cci(
+    high: pd.Series,
+    low: pd.Series,
+    close: pd.Series,
+    period: int = 20,
+    typical_price: Optional[pd.Series] = None
+) -> pd.Series:
+    """Calculate Commodity Channel Index (typical_price may be passed in if already computed)"""
+    if typical_price is None:
+        typical_price = (high + low + close) / 3
     sma = typical_price.rolling(period).mean()
-    mad = typical_price.rolling(period).apply(lambda x: np.abs(x - x.mean()).mean())
+    
+    # Mean absolute deviation over every window at once instead of a
+    # Python callback per window
+    tp = typical_price.to_numpy(dtype=np.float64)
+    mad_values = np.full(len(tp), np.nan)
+    if len(tp) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(tp, period)
+        means = windows.mean(axis=1)
+        mad_values[period - 1:] = np.abs(windows - means[:, None]).mean(axis=1)
+    mad = pd.Series(mad_values, index=typical_price.index)
     
     cci = (typical_price - sma) / (0.015 * mad)
     return cci
 
 
+# Score categories and their weights in the final technical score
+_TECH_CATEGORIES = ("trend", "momentum", "volatility", "volume", "price_action")
+_TECH_WEIGHTS = np.array([0.25, 0.25, 0.20, 0.15, 0.15])
+
+# Signal bands, as (lower, upper, deltas, messages). A value below the
+# i-th lower threshold or above the i-th upper threshold moves it one band
+# down or up; see _score_band. A None message means no signal.
+_RSI_BANDS = ((30, 40), (60, 70), (15, 0, 5, 0, -15), (
+    "RSI oversold ({:.1f}) - potential bounce",
+    None,
+    "RSI neutral ({:.1f})",
+    None,
+    "RSI overbought ({:.1f}) - potential pullback",
+))
+_STOCH_RSI_BANDS = ((20,), (80,), (10, 0, -10), (
+    "Stochastic RSI oversold ({:.1f})",
+    None,
+    "Stochastic RSI overbought ({:.1f})",
+))
+_BB_POSITION_BANDS = ((0.2,), (0.8,), (15, 0, -10), (
+    "Price near lower Bollinger Band (potential support)",
+    None,
+    "Price near upper Bollinger Band (potential resistance)",
+))
+_VOLUME_RATIO_BANDS = ((0.5,), (1.5,), (-10, 0, 15), (
+    "Low volume ({:.1f}x average) - weak conviction",
+    None,
+    "High volume ({:.1f}x average) - confirms move",
+))
+_MFI_BANDS = ((20,), (80,), (10, 0, -10), (
+    "MFI oversold ({:.1f}) - buying pressure likely",
+    None,
+    "MFI overbought ({:.1f}) - selling pressure likely",
+))
+_ROC_BANDS = ((-5,), (5,), (-10, 0, 10), (
+    "Weak 5-day momentum ({:.1f}%)",
+    None,
+    "Strong 5-day momentum (+{:.1f}%)",
+))
+_WILLIAMS_R_BANDS = ((-80,), (-20,), (10, 0, -10), (
+    "Williams %R oversold ({:.1f})",
+    None,
+    "Williams %R overbought ({:.1f})",
+))
+_CCI_BANDS = ((-100,), (100,), (10, 0, -10), (
+    "CCI oversold ({:.1f})",
+    None,
+    "CCI overbought ({:.1f})",
+))
+
+# Latest-row values that feed get_technical_score, in the order _score_latest expects
+_SCORE_INPUTS = (
+    "Close", "SMA_20", "SMA_50", "SMA_200",
+    "RSI", "MACD", "MACD_Signal", "MACD_Histogram", "StochRSI",
+    "BB_Position", "BB_Width", "BB_Width_20Mean", "ADX", "DI_Plus", "DI_Minus",
+    "Volume_Ratio", "MFI", "ROC_5", "Williams_R", "CCI",
+)
+_MACD_HISTOGRAM = _SCORE_INPUTS.index("MACD_Histogram")
+
+# Missing inputs all use this one NaN object so equal rows give equal cache keys
+_NAN = float("nan")
+
+
 def get_technical_score(df: pd.DataFrame) -> Dict[str, Any]:
     """
     Calculate overall technical score (0-100) based on indicators
@@ -184,35 +424,73 @@ def get_technical_score(df: pd.DataFrame) -> Dict[str, Any]:
     if df.empty or len(df) < 50:
         return {"score": 50, "signals": [], "error": "Insufficient data"}
     
-    latest = df.iloc[-1]
+    # Pull the latest row's inputs as one float array; columns that are
+    # missing from the frame read as NaN
+    positions = df.columns.get_indexer(_SCORE_INPUTS)
+    present = positions >= 0
+    row = np.full(len(_SCORE_INPUTS), np.nan)
+    row[present] = df.iloc[[-1], positions[present]].to_numpy(dtype=np.float64)[0]
+    
+    # The score only depends on the latest row plus the previous MACD
+    # histogram bar, so repeated scoring of the same data hits the cache
+    hist_prev = df["MACD_Histogram"].iat[-2] if present[_MACD_HISTOGRAM] else np.nan
+    
+    inputs = np.append(row, hist_prev)
+    missing = np.isnan(inputs).tolist()
+    result = _score_latest(tuple(
+        _NAN if is_missing else value for value, is_missing in zip(inputs.tolist(), missing)
+    ))
+    return {
+        "score": result["score"],
+        "components": dict(result["components"]),
+        "signals": list(result["signals"]),
+        "latest_indicators": dict(result["latest_indicators"]),
+    }
+
+
+def _score_band(value: float, bands: tuple) -> Tuple[int, Optional[str]]:
+    """Look up the score delta and signal message for an indicator value"""
+    lower, upper, deltas, messages = bands
+    # Strictly below a lower threshold / strictly above an upper one
+    i = bisect_right(lower, value) + bisect_left(upper, value)
+    message = messages[i]
+    return deltas[i], message.format(value) if message else None
+
+
+@lru_cache(maxsize=8192)
+def _score_latest(inputs: Tuple[float, ...]) -> Dict[str, Any]:
+    """Score the latest indicator values (see _SCORE_INPUTS)"""
+    (close, sma_20, sma_50, sma_200,
+     rsi, macd, macd_signal, hist_now, stoch,
+     bb_pos, bb_width, recent_width, adx, di_plus, di_minus,
+     vol_ratio, mfi, roc5, williams, cci,
+     hist_prev) = inputs
+    
     signals = []
-    scores = []
     
     # 1. Trend Score (25% weight)
     trend_score = 50
     trend_signals = []
     
     # Price vs Moving Averages
-    close = latest["Close"]
-    
-    if pd.notna(latest.get("SMA_20")):
-        if close > latest["SMA_20"]:
+    if not np.isnan(sma_20):
+        if close > sma_20:
             trend_score += 5
             trend_signals.append("Price above SMA20 (bullish)")
         else:
             trend_score -= 5
             trend_signals.append("Price below SMA20 (bearish)")
     
-    if pd.notna(latest.get("SMA_50")):
-        if close > latest["SMA_50"]:
+    if not np.isnan(sma_50):
+        if close > sma_50:
             trend_score += 5
             trend_signals.append("Price above SMA50 (bullish)")
         else:
             trend_score -= 5
             trend_signals.append("Price below SMA50 (bearish)")
     
-    if pd.notna(latest.get("SMA_200")):
-        if close > latest["SMA_200"]:
+    if not np.isnan(sma_200):
+        if close > sma_200:
             trend_score += 10
             trend_signals.append("Price above SMA200 (long-term bullish)")
         else:
@@ -220,16 +498,14 @@ def get_technical_score(df: pd.DataFrame) -> Dict[str, Any]:
             trend_signals.append("Price below SMA200 (long-term bearish)")
     
     # Golden/Death Cross
-    if pd.notna(latest.get("SMA_50")) and pd.notna(latest.get("SMA_200")):
-        if latest["SMA_50"] > latest["SMA_200"]:
+    if not np.isnan(sma_50) and not np.isnan(sma_200):
+        if sma_50 > sma_200:
             trend_score += 10
             trend_signals.append("Golden cross active (SMA50 > SMA200)")
         else:
             trend_score -= 10
             trend_signals.append("Death cross active (SMA50 < SMA200)")
     
-    trend_score = max(0, min(100, trend_score))
-    scores.append(("trend", trend_score, 0.25))
     signals.extend([("trend", s) for s in trend_signals])
     
     # 2. Momentum Score (25% weight)
@@ -237,21 +513,15 @@ def get_technical_score(df: pd.DataFrame) -> Dict[str, Any]:
     momentum_signals = []
     
     # RSI
-    if pd.notna(latest.get("RSI")):
-        rsi = latest["RSI"]
-        if rsi < 30:
-            momentum_score += 15
-            momentum_signals.append(f"RSI oversold ({rsi:.1f}) - potential bounce")
-        elif rsi > 70:
-            momentum_score -= 15
-            momentum_signals.append(f"RSI overbought ({rsi:.1f}) - potential pullback")
-        elif 40 <= rsi <= 60:
-            momentum_score += 5
-            momentum_signals.append(f"RSI neutral ({rsi:.1f})")
+    if not np.isnan(rsi):
+        delta, message = _score_band(rsi, _RSI_BANDS)
+        momentum_score += delta
+        if message:
+            momentum_signals.append(message)
     
     # MACD
-    if pd.notna(latest.get("MACD")) and pd.notna(latest.get("MACD_Signal")):
-        if latest["MACD"] > latest["MACD_Signal"]:
+    if not np.isnan(macd) and not np.isnan(macd_signal):
+        if macd > macd_signal:
             momentum_score += 10
             momentum_signals.append("MACD bullish crossover")
         else:
@@ -259,25 +529,18 @@ def get_technical_score(df: pd.DataFrame) -> Dict[str, Any]:
             momentum_signals.append("MACD bearish crossover")
         
         # MACD histogram trend
-        if pd.notna(latest.get("MACD_Histogram")):
-            hist_now = latest["MACD_Histogram"]
-            hist_prev = df["MACD_Histogram"].iloc[-2] if len(df) > 1 else hist_now
+        if not np.isnan(hist_now):
             if hist_now > hist_prev:
                 momentum_score += 5
                 momentum_signals.append("MACD histogram increasing")
     
     # Stochastic RSI
-    if pd.notna(latest.get("StochRSI")):
-        stoch = latest["StochRSI"]
-        if stoch < 20:
-            momentum_score += 10
-            momentum_signals.append(f"Stochastic RSI oversold ({stoch:.1f})")
-        elif stoch > 80:
-            momentum_score -= 10
-            momentum_signals.append(f"Stochastic RSI overbought ({stoch:.1f})")
+    if not np.isnan(stoch):
+        delta, message = _score_band(stoch, _STOCH_RSI_BANDS)
+        momentum_score += delta
+        if message:
+            momentum_signals.append(message)
     
-    momentum_score = max(0, min(100, momentum_score))
-    scores.append(("momentum", momentum_score, 0.25))
     signals.extend([("momentum", s) for s in momentum_signals])
     
     # 3. Volatility Score (20% weight)
@@ -285,31 +548,26 @@ def get_technical_score(df: pd.DataFrame) -> Dict[str, Any]:
     volatility_signals = []
     
     # Bollinger Band position
-    if pd.notna(latest.get("BB_Position")):
-        bb_pos = latest["BB_Position"]
-        if bb_pos < 0.2:
-            volatility_score += 15
-            volatility_signals.append("Price near lower Bollinger Band (potential support)")
-        elif bb_pos > 0.8:
-            volatility_score -= 10
-            volatility_signals.append("Price near upper Bollinger Band (potential resistance)")
+    if not np.isnan(bb_pos):
+        delta, message = _score_band(bb_pos, _BB_POSITION_BANDS)
+        volatility_score += delta
+        if message:
+            volatility_signals.append(message)
         
         # Bollinger squeeze
-        if pd.notna(latest.get("BB_Width")):
+        if not np.isnan(bb_width):
             # Compare to recent average
-            recent_width = df["BB_Width"].tail(20).mean()
-            if latest["BB_Width"] < recent_width * 0.7:
+            if bb_width < recent_width * 0.7:
                 volatility_score += 10
                 volatility_signals.append("Bollinger squeeze detected - breakout likely")
     
     # ADX
-    if pd.notna(latest.get("ADX")):
-        adx = latest["ADX"]
+    if not np.isnan(adx):
         if adx > 25:
             volatility_signals.append(f"Strong trend (ADX: {adx:.1f})")
             # Trend direction
-            if pd.notna(latest.get("DI_Plus")) and pd.notna(latest.get("DI_Minus")):
-                if latest["DI_Plus"] > latest["DI_Minus"]:
+            if not np.isnan(di_plus) and not np.isnan(di_minus):
+                if di_plus > di_minus:
                     volatility_score += 10
                     volatility_signals.append("Bullish trend confirmed (DI+ > DI-)")
                 else:
@@ -318,35 +576,25 @@ def get_technical_score(df: pd.DataFrame) -> Dict[str, Any]:
         else:
             volatility_signals.append(f"Weak trend (ADX: {adx:.1f})")
     
-    volatility_score = max(0, min(100, volatility_score))
-    scores.append(("volatility", volatility_score, 0.20))
     signals.extend([("volatility", s) for s in volatility_signals])
     
     # 4. Volume Score (15% weight)
     volume_score = 50
     volume_signals = []
     
-    if pd.notna(latest.get("Volume_Ratio")):
-        vol_ratio = latest["Volume_Ratio"]
-        if vol_ratio > 1.5:
-            volume_score += 15
-            volume_signals.append(f"High volume ({vol_ratio:.1f}x average) - confirms move")
-        elif vol_ratio < 0.5:
-            volume_score -= 10
-            volume_signals.append(f"Low volume ({vol_ratio:.1f}x average) - weak conviction")
+    if not np.isnan(vol_ratio):
+        delta, message = _score_band(vol_ratio, _VOLUME_RATIO_BANDS)
+        volume_score += delta
+        if message:
+            volume_signals.append(message)
     
     # MFI
-    if pd.notna(latest.get("MFI")):
-        mfi = latest["MFI"]
-        if mfi < 20:
-            volume_score += 10
-            volume_signals.append(f"MFI oversold ({mfi:.1f}) - buying pressure likely")
-        elif mfi > 80:
-            volume_score -= 10
-            volume_signals.append(f"MFI overbought ({mfi:.1f}) - selling pressure likely")
-    
-    volume_score = max(0, min(100, volume_score))
-    scores.append(("volume", volume_score, 0.15))
+    if not np.isnan(mfi):
+        delta, message = _score_band(mfi, _MFI_BANDS)
+        volume_score += delta
+        if message:
+            volume_signals.append(message)
+    
     signals.extend([("volume", s) for s in volume_signals])
     
     # 5. Price Action Score (15% weight)
@@ -354,53 +602,44 @@ def get_technical_score(df: pd.DataFrame) -> Dict[str, Any]:
     price_action_signals = []
     
     # Rate of change
-    if pd.notna(latest.get("ROC_5")):
-        roc5 = latest["ROC_5"]
-        if roc5 > 5:
-            price_action_score += 10
-            price_action_signals.append(f"Strong 5-day momentum (+{roc5:.1f}%)")
-        elif roc5 < -5:
-            price_action_score -= 10
-            price_action_signals.append(f"Weak 5-day momentum ({roc5:.1f}%)")
+    if not np.isnan(roc5):
+        delta, message = _score_band(roc5, _ROC_BANDS)
+        price_action_score += delta
+        if message:
+            price_action_signals.append(message)
     
     # Williams %R
-    if pd.notna(latest.get("Williams_R")):
-        williams = latest["Williams_R"]
-        if williams < -80:
-            price_action_score += 10
-            price_action_signals.append(f"Williams %R oversold ({williams:.1f})")
-        elif williams > -20:
-            price_action_score -= 10
-            price_action_signals.append(f"Williams %R overbought ({williams:.1f})")
+    if not np.isnan(williams):
+        delta, message = _score_band(williams, _WILLIAMS_R_BANDS)
+        price_action_score += delta
+        if message:
+            price_action_signals.append(message)
     
     # CCI
-    if pd.notna(latest.get("CCI")):
-        cci = latest["CCI"]
-        if cci < -100:
-            price_action_score += 10
-            price_action_signals.append(f"CCI oversold ({cci:.1f})")
-        elif cci > 100:
-            price_action_score -= 10
-            price_action_signals.append(f"CCI overbought ({cci:.1f})")
-    
-    price_action_score = max(0, min(100, price_action_score))
-    scores.append(("price_action", price_action_score, 0.15))
+    if not np.isnan(cci):
+        delta, message = _score_band(cci, _CCI_BANDS)
+        price_action_score += delta
+        if message:
+            price_action_signals.append(message)
+    
     signals.extend([("price_action", s) for s in price_action_signals])
     
     # Calculate weighted final score
-    final_score = sum(score * weight for _, score, weight in scores)
+    components = np.array([trend_score, momentum_score, volatility_score, volume_score, price_action_score])
+    np.clip(components, 0, 100, out=components)
+    final_score = float(components @ _TECH_WEIGHTS)
     
     return {
         "score": round(final_score, 1),
-        "components": {name: score for name, score, _ in scores},
+        "components": dict(zip(_TECH_CATEGORIES, components.tolist())),
         "signals": signals,
         "latest_indicators": {
-            "RSI": latest.get("RSI"),
-            "MACD": latest.get("MACD"),
-            "MACD_Signal": latest.get("MACD_Signal"),
-            "BB_Position": latest.get("BB_Position"),
-            "ADX": latest.get("ADX"),
-            "Volume_Ratio": latest.get("Volume_Ratio"),
+            "RSI": rsi,
+            "MACD": macd,
+            "MACD_Signal": macd_signal,
+            "BB_Position": bb_pos,
+            "ADX": adx,
+            "Volume_Ratio": vol_ratio,
         }
     }
 
@@ -464,23 +703,13 @@ def _detect_double_bottom(lows: np.ndarray, tolerance: float = 0.03) -> bool:
     if len(lows) < 10:
         return False
     
-    # Find local minima
-    minima_idx = []
-    for i in range(2, len(lows) - 2):
-        if lows[i] < lows[i-1] and lows[i] < lows[i-2] and \
-           lows[i] < lows[i+1] and lows[i] < lows[i+2]:
-            minima_idx.append(i)
+    # Find local minima (lower than the two bars on either side)
+    center = lows[2:-2]
+    mask = (center < lows[1:-3]) & (center < lows[:-4]) & \
+           (center < lows[3:-1]) & (center < lows[4:])
     
     # Check for two similar lows
-    for i in range(len(minima_idx) - 1):
-        for j in range(i + 1, len(minima_idx)):
-            if abs(minima_idx[j] - minima_idx[i]) >= 5:  # At least 5 bars apart
-                low1 = lows[minima_idx[i]]
-                low2 = lows[minima_idx[j]]
-                if abs(low1 - low2) / low1 <= tolerance:
-                    return True
-    
-    return False
+    return _has_matching_extremes(lows, np.flatnonzero(mask) + 2, tolerance)
 
 
 def _detect_double_top(highs: np.ndarray, tolerance: float = 0.03) -> bool:
@@ -488,23 +717,26 @@ def _detect_double_top(highs: np.ndarray, tolerance: float = 0.03) -> bool:
     if len(highs) < 10:
         return False
     
-    # Find local maxima
-    maxima_idx = []
-    for i in range(2, len(highs) - 2):
-        if highs[i] > highs[i-1] and highs[i] > highs[i-2] and \
-           highs[i] > highs[i+1] and highs[i] > highs[i+2]:
-            maxima_idx.append(i)
+    # Find local maxima (higher than the two bars on either side)
+    center = highs[2:-2]
+    mask = (center > highs[1:-3]) & (center > highs[:-4]) & \
+           (center > highs[3:-1]) & (center > highs[4:])
     
     # Check for two similar highs
-    for i in range(len(maxima_idx) - 1):
-        for j in range(i + 1, len(maxima_idx)):
-            if abs(maxima_idx[j] - maxima_idx[i]) >= 5:
-                high1 = highs[maxima_idx[i]]
-                high2 = highs[maxima_idx[j]]
-                if abs(high1 - high2) / high1 <= tolerance:
-                    return True
+    return _has_matching_extremes(highs, np.flatnonzero(mask) + 2, tolerance)
+
+
+def _has_matching_extremes(values: np.ndarray, idx: np.ndarray, tolerance: float) -> bool:
+    """Check whether two extremes at least 5 bars apart are within tolerance of each other"""
+    if len(idx) < 2:
+        return False
     
-    return False
+    extremes = values[idx]
+    # Pair every extreme with each later one; the earlier one is the reference
+    first, second = np.triu_indices(len(idx), k=1)
+    far_enough = (idx[second] - idx[first]) >= 5
+    similar = np.abs(extremes[first] - extremes[second]) / extremes[first] <= tolerance
+    return bool(np.any(far_enough & similar))
 
 
 def _is_uptrend(highs: np.ndarray, lows: np.ndarray) -> bool:
@@ -513,13 +745,8 @@ def _is_uptrend(highs: np.ndarray, lows: np.ndarray) -> bool:
         return False
     
     # Compare first half to second half
-    mid = len(highs) // 2
-    first_avg_high = np.mean(highs[:mid])
-    second_avg_high = np.mean(highs[mid:])
-    first_avg_low = np.mean(lows[:mid])
-    second_avg_low = np.mean(lows[mid:])
-    
-    return second_avg_high > first_avg_high and second_avg_low > first_avg_low
+    first, second = _half_means(highs, lows)
+    return bool(np.all(second > first))
 
 
 def _is_downtrend(highs: np.ndarray, lows: np.ndarray) -> bool:
@@ -527,10 +754,15 @@ def _is_downtrend(highs: np.ndarray, lows: np.ndarray) -> bool:
     if len(highs) < 10:
         return False
     
+    first, second = _half_means(highs, lows)
+    return bool(np.all(second < first))
+
+
+def _half_means(highs: np.ndarray, lows: np.ndarray) -> np.ndarray:
+    """Average high and low of the first and second half, as [[high, low], [high, low]]"""
+    # np.mean sums pairwise; keep it so halves that tie compare equal
     mid = len(highs) // 2
-    first_avg_high = np.mean(highs[:mid])
-    second_avg_high = np.mean(highs[mid:])
-    first_avg_low = np.mean(lows[:mid])
-    second_avg_low = np.mean(lows[mid:])
-    
-    return second_avg_high < first_avg_high and second_avg_low < first_avg_low
+    return np.array([
+        [np.mean(highs[:mid]), np.mean(lows[:mid])],
+        [np.mean(highs[mid:]), np.mean(lows[mid:])],
+    ])
@@ -1,7 +1,7 @@
 """
 Configuration management for Stock Trading Assistant
 """
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from typing import Optional
 from functools import lru_cache
@@ -29,6 +29,9 @@ class Settings(BaseSettings):
     database_url: str = Field(default="sqlite:///./data/trading.db")
     user_timezone: str = Field(default="Europe/Zurich")
     base_currency: str = Field(default="CHF")
+    history_cache_dir: str = Field(default="./data/cache/ohlcv")  # empty disables
+    use_float32: bool = Field(default=False)  # store OHLC history as float32
+    debug: bool = Field(default=False)  # make unplanned lazy loads raise
     
     # Recommendation Settings
     max_daily_recommendations: int = Field(default=3)
@@ -40,10 +43,13 @@ class Settings(BaseSettings):
     moderate_allocation: float = Field(default=0.70)
     aggressive_allocation: float = Field(default=0.30)
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    # Settings are read-only once loaded; every module shares one instance
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        frozen=True,
+    )
 
 
 @lru_cache()
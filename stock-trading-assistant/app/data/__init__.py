@@ -18,6 +18,7 @@ from app.data.forex import (
 from app.data.screener import (
     get_screening_candidates,
     discover_opportunities,
+    discover_opportunities_async,
 )
 
 __all__ = [
@@ -33,4 +34,5 @@ __all__ = [
     "get_all_rates",
     "get_screening_candidates",
     "discover_opportunities",
+    "discover_opportunities_async",
 ]
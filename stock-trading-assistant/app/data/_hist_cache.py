@@ -0,0 +1,200 @@
+"""
+On-disk cache for Yahoo Finance OHLCV history
+
+Screening runs and chart requests fetch the same few months of bars for the
+same symbols many times a day. Frames are pickled per (symbol, period,
+interval) and reused until the bars could have changed: intraday data for a
+few minutes, daily and longer bars from the exchange's close until its next
+session opens.
+"""
+import yfinance as yf
+import pandas as pd
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import re
+import tempfile
+import time
+from zoneinfo import ZoneInfo
+
+from app.config import get_settings
+from app.data._rate import PRICE_LIMITER
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+INTRADAY_TTL_SECONDS = 5 * 60
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+
+# Symbols per yf.download call; longer lists run into Yahoo's URL length limit
+DOWNLOAD_CHUNK_SIZE = 200
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._=^-]")
+
+# (open hour, close hour, timezone) of the symbol's exchange
+MarketHours = Tuple[int, int, ZoneInfo]
+
+
+def cached_history(
+    yahoo_ticker: str,
+    period: str = "1mo",
+    interval: str = "1d",
+    hours: Optional[MarketHours] = None
+) -> pd.DataFrame:
+    """
+    Get yf.Ticker(yahoo_ticker).history(period=period, interval=interval),
+    served from disk while still fresh
+    
+    Without the exchange's hours, daily bars are only kept as long as
+    intraday ones. Empty frames are never cached. Set HISTORY_CACHE_DIR to
+    an empty string to disable the cache.
+    """
+    path = _cache_path("history", yahoo_ticker, period, interval)
+    
+    if path is not None and _is_fresh(path, interval, hours):
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.debug(f"Discarding unreadable history cache {path.name}: {e}")
+    
+    PRICE_LIMITER.acquire()
+    df = yf.Ticker(yahoo_ticker).history(period=period, interval=interval)
+    
+    if path is not None and not df.empty:
+        _write(path, df)
+    
+    return df
+
+
+def cached_history_batch(
+    yahoo_tickers: List[str],
+    period: str = "1mo",
+    interval: str = "1d",
+    hours: Optional[Dict[str, MarketHours]] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Batch version of cached_history(); hours maps symbols to their
+    exchange's hours
+    
+    Fresh symbols come from disk; the rest are fetched with yf.download,
+    which spreads the requests over its own thread pool. Symbols without
+    data are left out of the result.
+    """
+    histories = {}
+    missing = []
+    
+    for yahoo_ticker in dict.fromkeys(yahoo_tickers):
+        path = _cache_path("download", yahoo_ticker, period, interval)
+        if path is not None and _is_fresh(path, interval, (hours or {}).get(yahoo_ticker)):
+            try:
+                histories[yahoo_ticker] = pd.read_pickle(path)
+                continue
+            except Exception as e:
+                logger.debug(f"Discarding unreadable history cache {path.name}: {e}")
+        missing.append(yahoo_ticker)
+    
+    for start in range(0, len(missing), DOWNLOAD_CHUNK_SIZE):
+        chunk = missing[start:start + DOWNLOAD_CHUNK_SIZE]
+        PRICE_LIMITER.acquire()
+        try:
+            data = yf.download(
+                " ".join(chunk),
+                period=period,
+                interval=interval,
+                group_by="ticker",
+                threads=True,
+                progress=False,
+                auto_adjust=True,
+            )
+        except Exception as e:
+            logger.warning(f"Batch history download failed for {len(chunk)} symbols: {e}")
+            continue
+        
+        for yahoo_ticker in chunk:
+            if isinstance(data.columns, pd.MultiIndex):
+                if yahoo_ticker not in data.columns.get_level_values(0):
+                    continue
+                df = data[yahoo_ticker]
+            else:
+                df = data
+            
+            # The batch is aligned on the union of all symbols' trading days
+            df = df.dropna(how="all")
+            if df.empty:
+                continue
+            
+            histories[yahoo_ticker] = df
+            path = _cache_path("download", yahoo_ticker, period, interval)
+            if path is not None:
+                _write(path, df)
+    
+    return histories
+
+
+def _cache_path(source: str, yahoo_ticker: str, period: str, interval: str) -> Optional[Path]:
+    """
+    Cache file for a request, or None when caching is disabled
+    
+    Ticker.history and yf.download frames differ in shape (download has no
+    Dividends/Stock Splits columns and a tz-naive daily index), so each
+    source gets its own file.
+    """
+    if not settings.history_cache_dir:
+        return None
+    name = _UNSAFE_CHARS.sub("_", f"{source}_{yahoo_ticker}_{period}_{interval}")
+    return Path(settings.history_cache_dir) / f"{name}.pkl"
+
+
+def _is_fresh(path: Path, interval: str, hours: Optional[MarketHours]) -> bool:
+    """Whether the bars in the file could not have changed since it was written"""
+    try:
+        modified = path.stat().st_mtime
+    except OSError:
+        return False
+    
+    if time.time() - modified < INTRADAY_TTL_SECONDS:
+        return True
+    
+    if interval in INTRADAY_INTERVALS or hours is None:
+        return False
+    
+    # The current daily bar moves all session long; once the market has
+    # closed, the bars stay final until it opens again
+    settled = _settled_since(hours)
+    return settled is not None and modified >= settled
+
+
+def _settled_since(hours: MarketHours) -> Optional[float]:
+    """
+    Timestamp from which the exchange's daily bars are final, or None while
+    it is trading
+    
+    That is the last weekday close plus INTRADAY_TTL_SECONDS, so Yahoo has
+    had time to publish the closing bar. Holidays are not known here and
+    count as trading days, which only costs a refetch.
+    """
+    open_hour, close_hour, tz = hours
+    now = datetime.now(tz)
+    
+    if now.weekday() < 5 and open_hour <= now.hour < close_hour:
+        return None
+    
+    close = now.replace(hour=close_hour, minute=0, second=0, microsecond=0)
+    while close > now or close.weekday() >= 5:
+        close -= timedelta(days=1)
+    
+    return close.timestamp() + INTRADAY_TTL_SECONDS
+
+
+def _write(path: Path, df: pd.DataFrame) -> None:
+    """Write atomically so concurrent screens never read a partial file"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            df.to_pickle(f)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning(f"Could not write history cache {path.name}: {e}")
@@ -0,0 +1,42 @@
+"""
+Client-side rate limiting for Yahoo Finance requests
+
+Yahoo throttles per IP and answers bursts with 429s. Every fetch takes a
+token from the matching bucket first, so normal traffic goes straight
+through while a large screen is spread out instead of getting blocked.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Blocking token-bucket rate limiter, safe to share between threads"""
+    
+    def __init__(self, rate_per_sec: float, burst: int):
+        self.rate = rate_per_sec
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                wait = (1 - self._tokens) / self.rate
+            
+            time.sleep(wait)
+
+
+# Prices, history and fast_info are cheap for Yahoo; info/quoteSummary
+# lookups are the ones that get throttled first
+PRICE_LIMITER = TokenBucket(5.0, 20)
+INFO_LIMITER = TokenBucket(2.0, 8)
@@ -0,0 +1,62 @@
+"""
+Array kernels for the screeners
+
+Every function works on a (stocks, bars) float64 matrix with one row per
+stock, so a metric is computed for the whole candidate list in one pass.
+Histories of different lengths are right-aligned and left-padded with NaN.
+"""
+import numpy as np
+from typing import List, Tuple
+
+
+def stack_tails(series: List[np.ndarray]) -> np.ndarray:
+    """Stack 1-D arrays into a matrix aligned on their last element"""
+    length = max(len(values) for values in series)
+    matrix = np.full((len(series), length), np.nan)
+    for row, values in zip(matrix, series):
+        row[length - len(values):] = values
+    return matrix
+
+
+def nanmean_rows(values: np.ndarray) -> np.ndarray:
+    """Row means skipping NaN, like DataFrame.mean(); all-NaN rows give NaN"""
+    valid = ~np.isnan(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(valid, values, 0.0).sum(axis=1) / valid.sum(axis=1)
+
+
+def rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and sample standard deviation of every complete window in each row
+    
+    Returns two (stocks, bars - window + 1) matrices; column i covers bars
+    i .. i + window - 1. Windows containing NaN give NaN, like
+    Series.rolling(window).
+    
+    Running sums make each step O(1) whatever the window length. Rows are
+    shifted by their mean first so the sum-of-squares difference stays well
+    conditioned for prices far from zero.
+    """
+    missing = np.isnan(values)
+    shift = nanmean_rows(values)[:, None]
+    centered = np.where(missing, 0.0, values - shift)
+    
+    sums = _window_sums(centered, window)
+    sums_sq = _window_sums(centered * centered, window)
+    gaps = _window_sums(missing.astype(np.float64), window)
+    
+    mean = sums / window
+    var = np.maximum((sums_sq - sums * mean) / (window - 1), 0.0)
+    
+    mean += shift
+    mean[gaps > 0] = np.nan
+    std = np.sqrt(var)
+    std[gaps > 0] = np.nan
+    return mean, std
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of every complete window in each row, from one cumulative sum"""
+    totals = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=totals[:, 1:])
+    return totals[:, window:] - totals[:, :-window]
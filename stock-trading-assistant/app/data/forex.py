@@ -2,11 +2,15 @@
 Currency conversion and forex rates
 """
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional
 from functools import lru_cache
 import logging
+import threading
+import time
 import yfinance as yf
+import numpy as np
 
 from app.config import get_settings
 
@@ -14,8 +18,29 @@ settings = get_settings()
 logger = logging.getLogger(__name__)
 
 # Cache for exchange rates (refreshed every hour)
-_rates_cache: Dict[str, tuple] = {}  # {currency: (rate_to_chf, timestamp)}
-CACHE_DURATION = timedelta(hours=1)
+_rates_cache: Dict[str, tuple] = {}  # {currency: (rate_to_chf, expires_at_monotonic)}
+CACHE_DURATION = 60 * 60  # seconds
+
+# One lock per currency so concurrent misses trigger a single fetch
+_rate_locks: Dict[str, threading.Lock] = {}
+_rate_locks_guard = threading.Lock()
+
+# Currencies shown on the dashboard and kept warm by refresh_rates()
+COMMON_CURRENCIES = ["USD", "EUR", "GBP", "CAD", "JPY", "AUD", "HKD", "SGD"]
+
+# Keep-alive session for the ECB fallback; transient errors and 429s are
+# retried with backoff, honouring Retry-After
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+    ),
+))
 
 
 def get_exchange_rate_to_chf(from_currency: str) -> float:
@@ -34,11 +59,24 @@ def get_exchange_rate_to_chf(from_currency: str) -> float:
         return 1.0
     
     # Check cache
-    if from_currency in _rates_cache:
-        rate, timestamp = _rates_cache[from_currency]
-        if datetime.now() - timestamp < CACHE_DURATION:
+    rate = _get_cached_rate(from_currency)
+    if rate is not None:
+        return rate
+    
+    with _get_rate_lock(from_currency):
+        # Another thread may have fetched it while we waited
+        rate = _get_cached_rate(from_currency)
+        if rate is not None:
             return rate
+        
+        rate = _fetch_rate(from_currency)
+        _store_rate(from_currency, rate)
     
+    return rate
+
+
+def _fetch_rate(from_currency: str) -> float:
+    """Fetch a rate from the first source that answers"""
     # Try yfinance first (most reliable)
     rate = _get_rate_yfinance(from_currency)
     
@@ -51,12 +89,33 @@ def get_exchange_rate_to_chf(from_currency: str) -> float:
         rate = _get_fallback_rate(from_currency)
         logger.warning(f"Using fallback rate for {from_currency}/CHF: {rate}")
     
-    # Cache the rate
-    _rates_cache[from_currency] = (rate, datetime.now())
-    
     return rate
 
 
+def _get_cached_rate(currency: str) -> Optional[float]:
+    """Return the cached rate for a currency if it is still fresh"""
+    cached = _rates_cache.get(currency)
+    if cached is not None:
+        rate, expires_at = cached
+        if time.monotonic() < expires_at:
+            return rate
+    return None
+
+
+def _store_rate(currency: str, rate: float):
+    """Cache a rate for CACHE_DURATION seconds"""
+    _rates_cache[currency] = (rate, time.monotonic() + CACHE_DURATION)
+
+
+def _get_rate_lock(currency: str) -> threading.Lock:
+    """Get or create the fetch lock for a currency"""
+    lock = _rate_locks.get(currency)
+    if lock is None:
+        with _rate_locks_guard:
+            lock = _rate_locks.setdefault(currency, threading.Lock())
+    return lock
+
+
 def _get_rate_yfinance(from_currency: str) -> Optional[float]:
     """Get exchange rate using yfinance"""
     try:
@@ -83,6 +142,34 @@ def _get_rate_yfinance(from_currency: str) -> Optional[float]:
         return None
 
 
+def _get_rates_yfinance_batch(currencies: List[str]) -> Dict[str, float]:
+    """Get exchange rates for several currencies with a single yfinance download"""
+    tickers = [f"{currency}CHF=X" for currency in currencies]
+    
+    try:
+        data = yf.download(
+            tickers,
+            period="5d",
+            group_by="ticker",
+            threads=True,
+            progress=False,
+        )
+    except Exception as e:
+        logger.debug(f"yfinance batch rate fetch failed for {currencies}: {e}")
+        return {}
+    
+    rates = {}
+    for currency, ticker in zip(currencies, tickers):
+        try:
+            close = data[ticker]["Close"].dropna()
+        except KeyError:
+            continue
+        if not close.empty:
+            rates[currency] = float(close.iloc[-1])
+    
+    return rates
+
+
 def _get_rate_ecb(from_currency: str) -> Optional[float]:
     """Get exchange rate from ECB API"""
     try:
@@ -90,7 +177,7 @@ def _get_rate_ecb(from_currency: str) -> Optional[float]:
         url = "https://api.frankfurter.app/latest"
         params = {"from": from_currency, "to": "CHF"}
         
-        response = requests.get(url, params=params, timeout=10)
+        response = _SESSION.get(url, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -156,10 +243,16 @@ def convert_from_chf(amount_chf: float, to_currency: str) -> float:
 
 def get_all_rates() -> Dict[str, float]:
     """Get all common exchange rates to CHF"""
-    currencies = ["USD", "EUR", "GBP", "CAD", "JPY", "AUD", "HKD", "SGD"]
     rates = {}
     
-    for currency in currencies:
+    # Fetch every stale rate in one batch; anything the batch misses goes
+    # through the per-currency fallbacks below
+    stale = [c for c in COMMON_CURRENCIES if _get_cached_rate(c) is None]
+    if stale:
+        for currency, rate in _get_rates_yfinance_batch(stale).items():
+            _store_rate(currency, rate)
+    
+    for currency in COMMON_CURRENCIES:
         try:
             rates[currency] = get_exchange_rate_to_chf(currency)
         except Exception as e:
@@ -169,6 +262,19 @@ def get_all_rates() -> Dict[str, float]:
     return rates
 
 
+def refresh_rates():
+    """
+    Re-fetch the common rates before they expire
+    
+    Run periodically so requests keep hitting a warm cache instead of
+    paying for the fetch when an entry runs out.
+    """
+    rates = _get_rates_yfinance_batch(COMMON_CURRENCIES)
+    for currency, rate in rates.items():
+        _store_rate(currency, rate)
+    logger.info(f"Refreshed {len(rates)} exchange rates")
+
+
 def get_currency_trend(currency_pair: str, days: int = 30) -> Dict[str, any]:
     """
     Get currency trend data
@@ -188,15 +294,16 @@ def get_currency_trend(currency_pair: str, days: int = 30) -> Dict[str, any]:
         if hist.empty:
             return {"error": "No data available"}
         
-        current = float(hist["Close"].iloc[-1])
-        start = float(hist["Close"].iloc[0])
+        close = hist["Close"].to_numpy()
+        current = float(close[-1])
+        start = float(close[0])
         
         change = current - start
         change_pct = (change / start) * 100
         
         # Simple trend analysis
-        sma_short = hist["Close"].tail(5).mean()
-        sma_long = hist["Close"].tail(20).mean()
+        sma_short = np.nanmean(close[-5:])
+        sma_long = np.nanmean(close[-20:])
         
         trend = "neutral"
         if sma_short > sma_long * 1.01:
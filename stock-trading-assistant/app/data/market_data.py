@@ -2,33 +2,75 @@
 Market data fetching from various sources
 """
 import yfinance as yf
+from yfinance.data import YfData
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Callable
 import logging
-import requests
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import lru_cache
+from itertools import islice
+import threading
 import time
+from zoneinfo import ZoneInfo
 
 from app.config import get_settings, EXCHANGE_INFO
+from app.data._hist_cache import cached_history
+from app.data._rate import INFO_LIMITER, PRICE_LIMITER
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# yfinance manages its own browser-impersonating session (a plain requests
+# Session gets throttled harder), so only turn on its retries for
+# transient connection errors and timeouts
+yf.config.network.retries = 3
+
+
+# Yahoo's multi-symbol quote endpoint and how many symbols to send per request
+YAHOO_QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+QUOTE_BATCH_SIZE = 20
+
+# quoteSummary returns only the modules asked for, unlike Ticker.info which
+# pulls dozens of them; these cover the fields the value screen reads
+YAHOO_QUOTE_SUMMARY_URL = "https://query2.finance.yahoo.com/v10/finance/quoteSummary"
+VALUE_SUMMARY_MODULES = ("price", "summaryDetail", "defaultKeyStatistics", "summaryProfile")
+
+# Ticker .info payloads are large and the most rate-limited Yahoo call, so
+# repeat lookups within INFO_CACHE_SECONDS are served from memory
+INFO_CACHE_SECONDS = 15 * 60
+INFO_CACHE_MAX_SIZE = 512
+_info_cache: Dict[Tuple[str, ...], Tuple[Dict[str, Any], float]] = {}  # {(kind, yahoo_ticker): (info, fetched_at)}
+_info_cache_lock = threading.Lock()
+
+
+# Trading hours per region as (open hour, close hour, timezone)
+_MARKET_HOURS = {
+    "US": (9, 16, ZoneInfo("America/New_York")),
+    "CA": (9, 16, ZoneInfo("America/Toronto")),
+    "EU": (8, 17, ZoneInfo("Europe/London")),
+    "CH": (9, 17, ZoneInfo("Europe/Zurich")),
+    "DE": (9, 17, ZoneInfo("Europe/Berlin")),
+}
+
 
 class MarketDataError(Exception):
     """Exception for market data errors"""
     pass
 
 
+# Yahoo symbol suffix for every exchange that needs one
+_SUFFIX = {exchange: info["suffix"] for exchange, info in EXCHANGE_INFO.items() if info["suffix"]}
+
+
+@lru_cache(maxsize=4096)
 def get_yahoo_ticker(ticker: str, exchange: str) -> str:
     """Convert ticker to Yahoo Finance format"""
     # Handle special cases
-    if exchange in EXCHANGE_INFO:
-        suffix = EXCHANGE_INFO[exchange]["suffix"]
-        if suffix and not ticker.endswith(suffix):
-            return f"{ticker}{suffix}"
+    suffix = _SUFFIX.get(exchange)
+    if suffix and not ticker.endswith(suffix):
+        return f"{ticker}{suffix}"
     
     # TSX Venture special handling
     if ".V" in ticker.upper() or exchange == "TSX-V":
@@ -43,6 +85,85 @@ def get_yahoo_ticker(ticker: str, exchange: str) -> str:
     return ticker
 
 
+def get_cached_info(yahoo_ticker: str) -> Dict[str, Any]:
+    """
+    Get yf.Ticker(yahoo_ticker).info, cached for INFO_CACHE_SECONDS
+    
+    Empty payloads are not cached so a failed lookup is retried next time.
+    """
+    return _cached_info(("info", yahoo_ticker), lambda: _fetch_info(yahoo_ticker))
+
+
+def get_cached_summary(
+    yahoo_ticker: str,
+    modules: Tuple[str, ...] = VALUE_SUMMARY_MODULES
+) -> Dict[str, Any]:
+    """
+    Get selected quoteSummary modules flattened into one info-style dict,
+    cached for INFO_CACHE_SECONDS
+    
+    Much lighter than Ticker.info when only a few fields are needed. Field
+    names match Ticker.info; earlier modules win on duplicates.
+    """
+    return _cached_info(
+        ("summary", yahoo_ticker, *modules),
+        lambda: _fetch_quote_summary(yahoo_ticker, modules),
+    )
+
+
+def _cached_info(key: Tuple[str, ...], fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Serve key from _info_cache while fresh, otherwise fetch() and store"""
+    with _info_cache_lock:
+        entry = _info_cache.get(key)
+        if entry is not None:
+            info, fetched_at = entry
+            if time.monotonic() - fetched_at < INFO_CACHE_SECONDS:
+                return info
+            del _info_cache[key]
+    
+    info = fetch()
+    
+    if info:
+        with _info_cache_lock:
+            if key not in _info_cache and len(_info_cache) >= INFO_CACHE_MAX_SIZE:
+                _info_cache.pop(next(iter(_info_cache)))
+            _info_cache[key] = (info, time.monotonic())
+    
+    return info
+
+
+def _fetch_info(yahoo_ticker: str) -> Dict[str, Any]:
+    """Fetch the full Ticker.info payload"""
+    INFO_LIMITER.acquire()
+    return yf.Ticker(yahoo_ticker).info
+
+
+def _fetch_quote_summary(yahoo_ticker: str, modules: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Fetch quoteSummary modules for one symbol
+    
+    Goes through yfinance's shared session so its cookie/crumb handling applies.
+    """
+    INFO_LIMITER.acquire()
+    data = YfData().get_raw_json(
+        f"{YAHOO_QUOTE_SUMMARY_URL}/{yahoo_ticker}",
+        params={"modules": ",".join(modules), "formatted": "false", "symbol": yahoo_ticker},
+    )
+    results = (data.get("quoteSummary") or {}).get("result") or []
+    if not results:
+        return {}
+    
+    summary = {}
+    for module in modules:
+        for key, value in (results[0].get(module) or {}).items():
+            # Unset fields come back as {} and some numbers as {"raw": ...}
+            if isinstance(value, dict):
+                value = value.get("raw")
+            if summary.get(key) is None:
+                summary[key] = value
+    return summary
+
+
 def get_stock_info(ticker: str, exchange: str = "") -> Dict[str, Any]:
     """
     Get comprehensive stock information
@@ -66,12 +187,12 @@ def get_stock_info(ticker: str, exchange: str = "") -> Dict[str, Any]:
     yahoo_ticker = get_yahoo_ticker(ticker, exchange)
     
     try:
-        stock = yf.Ticker(yahoo_ticker)
-        info = stock.info
+        info = get_cached_info(yahoo_ticker)
         
         if not info or "regularMarketPrice" not in info:
             # Try fast_info for basic data
-            fast = stock.fast_info
+            PRICE_LIMITER.acquire()
+            fast = yf.Ticker(yahoo_ticker).fast_info
             return {
                 "ticker": ticker,
                 "yahoo_ticker": yahoo_ticker,
@@ -131,6 +252,36 @@ def get_stock_info(ticker: str, exchange: str = "") -> Dict[str, Any]:
         raise MarketDataError(f"Failed to fetch data for {ticker}: {e}")
 
 
+def get_stock_info_batch(tickers: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Get stock information for several tickers at once
+    
+    Yahoo Finance has no batch endpoint for the full info payload, so the
+    per-ticker requests are issued concurrently instead of one after another.
+    
+    Args:
+        tickers: List of (ticker, exchange) tuples
+    
+    Returns:
+        Dict mapping (ticker, exchange) to stock info; tickers that could
+        not be fetched are omitted
+    """
+    unique = list(dict.fromkeys(tickers))
+    if not unique:
+        return {}
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(len(unique), 8)) as executor:
+        futures = {key: executor.submit(get_stock_info, *key) for key in unique}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except MarketDataError as e:
+                logger.warning(f"Skipping {key[0]} in batch fetch: {e}")
+    
+    return results
+
+
 def get_historical_data(
     ticker: str, 
     exchange: str = "",
@@ -152,8 +303,7 @@ def get_historical_data(
     yahoo_ticker = get_yahoo_ticker(ticker, exchange)
     
     try:
-        stock = yf.Ticker(yahoo_ticker)
-        df = stock.history(period=period, interval=interval)
+        df = cached_history(yahoo_ticker, period=period, interval=interval, hours=get_market_hours(exchange))
         
         if df.empty:
             raise MarketDataError(f"No historical data for {ticker}")
@@ -164,6 +314,9 @@ def get_historical_data(
             if col not in df.columns:
                 raise MarketDataError(f"Missing column {col} in data for {ticker}")
         
+        if settings.use_float32:
+            df = _downcast_ohlcv(df)
+        
         return df
         
     except Exception as e:
@@ -171,32 +324,67 @@ def get_historical_data(
         raise MarketDataError(f"Failed to fetch historical data for {ticker}: {e}")
 
 
+def _downcast_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Halve the memory of a history frame: prices as float32, volume as
+    int32 when it fits
+    
+    Indicator math upcasts back to float64, so this only affects storage.
+    """
+    df = df.astype({col: np.float32 for col in ["Open", "High", "Low", "Close"]})
+    volume = df["Volume"]
+    if volume.notna().all() and volume.max() <= np.iinfo(np.int32).max:
+        df["Volume"] = volume.astype(np.int32)
+    return df
+
+
 def get_multiple_quotes(tickers: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
     """
     Get current quotes for multiple tickers efficiently
     
+    Quotes are fetched QUOTE_BATCH_SIZE symbols per request from Yahoo's
+    quote endpoint; symbols missing from the batch responses fall back to
+    single-ticker lookups, which run concurrently.
+    
     Args:
         tickers: List of (ticker, exchange) tuples
     
     Returns:
         Dict mapping ticker to quote data
     """
+    yahoo_tickers = {key: get_yahoo_ticker(*key) for key in dict.fromkeys(tickers)}
+    symbols = list(dict.fromkeys(yahoo_tickers.values()))
+    
+    raw_quotes = {}
+    it = iter(symbols)
+    while batch := list(islice(it, QUOTE_BATCH_SIZE)):
+        try:
+            raw_quotes.update(_batch_quote(batch))
+        except Exception as e:
+            logger.warning(f"Batch quote request failed for {', '.join(batch)}: {e}")
+    
+    fallbacks = _single_quotes_concurrently([
+        (ticker, exchange, yahoo_ticker)
+        for (ticker, exchange), yahoo_ticker in yahoo_tickers.items()
+        if yahoo_ticker not in raw_quotes
+    ])
+    
     results = {}
     
-    for ticker, exchange in tickers:
+    for (ticker, exchange), yahoo_ticker in yahoo_tickers.items():
         try:
-            yahoo_ticker = get_yahoo_ticker(ticker, exchange)
-            stock = yf.Ticker(yahoo_ticker)
-            fast = stock.fast_info
-            
-            results[ticker] = {
-                "ticker": ticker,
-                "exchange": exchange,
-                "current_price": getattr(fast, "last_price", None),
-                "previous_close": getattr(fast, "previous_close", None),
-                "currency": getattr(fast, "currency", "USD"),
-                "market_cap": getattr(fast, "market_cap", None),
-            }
+            raw = raw_quotes.get(yahoo_ticker)
+            if raw is not None:
+                results[ticker] = {
+                    "ticker": ticker,
+                    "exchange": exchange,
+                    "current_price": raw.get("regularMarketPrice"),
+                    "previous_close": raw.get("regularMarketPreviousClose"),
+                    "currency": raw.get("currency", "USD"),
+                    "market_cap": raw.get("marketCap"),
+                }
+            else:
+                results[ticker] = fallbacks[(ticker, exchange)].result()
             
             # Calculate daily change
             if results[ticker]["current_price"] and results[ticker]["previous_close"]:
@@ -212,13 +400,61 @@ def get_multiple_quotes(tickers: List[Tuple[str, str]]) -> Dict[str, Dict[str, A
                 "exchange": exchange,
                 "error": str(e)
             }
-        
-        # Small delay to avoid rate limiting
-        time.sleep(0.1)
     
     return results
 
 
+def _batch_quote(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch raw quotes for up to QUOTE_BATCH_SIZE Yahoo symbols in one request
+    
+    Goes through yfinance's shared session so its cookie/crumb handling applies.
+    
+    Returns:
+        Dict mapping Yahoo symbol to its quoteResponse entry
+    """
+    PRICE_LIMITER.acquire()
+    data = YfData().get_raw_json(
+        YAHOO_QUOTE_URL,
+        params={"symbols": ",".join(symbols), "formatted": "false"},
+    )
+    quotes = (data.get("quoteResponse") or {}).get("result") or []
+    return {quote["symbol"]: quote for quote in quotes if quote.get("symbol")}
+
+
+def _single_quotes_concurrently(
+    missing: List[Tuple[str, str, str]]
+) -> Dict[Tuple[str, str], Future]:
+    """
+    Run _single_quote for each (ticker, exchange, yahoo_ticker) on a thread pool
+    
+    Returns completed futures keyed by (ticker, exchange); result() re-raises
+    any error from the lookup.
+    """
+    if not missing:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=min(len(missing), 8)) as executor:
+        return {
+            (ticker, exchange): executor.submit(_single_quote, ticker, exchange, yahoo_ticker)
+            for ticker, exchange, yahoo_ticker in missing
+        }
+
+
+def _single_quote(ticker: str, exchange: str, yahoo_ticker: str) -> Dict[str, Any]:
+    """Fetch one quote via fast_info"""
+    PRICE_LIMITER.acquire()
+    fast = yf.Ticker(yahoo_ticker).fast_info
+    return {
+        "ticker": ticker,
+        "exchange": exchange,
+        "current_price": getattr(fast, "last_price", None),
+        "previous_close": getattr(fast, "previous_close", None),
+        "currency": getattr(fast, "currency", "USD"),
+        "market_cap": getattr(fast, "market_cap", None),
+    }
+
+
 def get_market_movers(region: str = "US", count: int = 20) -> Dict[str, List[Dict]]:
     """
     Get market movers (gainers, losers, most active)
@@ -266,12 +502,24 @@ def get_sector_performance() -> Dict[str, float]:
     
     performance = {}
     
+    # All eleven ETFs fit in one quote request
+    try:
+        quotes = _batch_quote(list(sector_etfs.values()))
+    except Exception as e:
+        logger.warning(f"Batch sector quote failed, fetching ETFs one by one: {e}")
+        quotes = {}
+    
     for sector, etf in sector_etfs.items():
         try:
-            stock = yf.Ticker(etf)
-            fast = stock.fast_info
-            current = getattr(fast, "last_price", None)
-            prev = getattr(fast, "previous_close", None)
+            quote = quotes.get(etf)
+            if quote:
+                current = quote.get("regularMarketPrice")
+                prev = quote.get("regularMarketPreviousClose")
+            else:
+                PRICE_LIMITER.acquire()
+                fast = yf.Ticker(etf).fast_info
+                current = getattr(fast, "last_price", None)
+                prev = getattr(fast, "previous_close", None)
             
             if current and prev:
                 performance[sector] = ((current - prev) / prev) * 100
@@ -294,8 +542,7 @@ def search_stocks(query: str, limit: int = 10) -> List[Dict[str, Any]]:
         
         # Try the query as a ticker directly
         try:
-            stock = yf.Ticker(query.upper())
-            info = stock.info
+            info = get_cached_info(query.upper())
             if info.get("regularMarketPrice"):
                 results.append({
                     "ticker": query.upper(),
@@ -313,30 +560,20 @@ def search_stocks(query: str, limit: int = 10) -> List[Dict[str, Any]]:
         return []
 
 
+def get_market_hours(exchange: str) -> Optional[Tuple[int, int, ZoneInfo]]:
+    """Trading hours of an exchange as (open hour, close hour, timezone), None if unknown"""
+    if exchange not in EXCHANGE_INFO:
+        return None
+    return _MARKET_HOURS.get(EXCHANGE_INFO[exchange]["region"])
+
+
 def is_market_open(exchange: str) -> bool:
     """Check if a market is currently open"""
-    from datetime import datetime
-    import pytz
-    
-    if exchange not in EXCHANGE_INFO:
+    hours = get_market_hours(exchange)
+    if hours is None:
         return True  # Assume open if unknown
     
-    region = EXCHANGE_INFO[exchange]["region"]
-    
-    # Map region to market hours
-    market_hours = {
-        "US": {"open": 9, "close": 16, "tz": "America/New_York"},
-        "CA": {"open": 9, "close": 16, "tz": "America/Toronto"},
-        "EU": {"open": 8, "close": 17, "tz": "Europe/London"},
-        "CH": {"open": 9, "close": 17, "tz": "Europe/Zurich"},
-        "DE": {"open": 9, "close": 17, "tz": "Europe/Berlin"},
-    }
-    
-    if region not in market_hours:
-        return True
-    
-    hours = market_hours[region]
-    tz = pytz.timezone(hours["tz"])
+    open_hour, close_hour, tz = hours
     now = datetime.now(tz)
     
     # Check if weekend
@@ -344,7 +581,7 @@ def is_market_open(exchange: str) -> bool:
         return False
     
     # Check hours
-    return hours["open"] <= now.hour < hours["close"]
+    return open_hour <= now.hour < close_hour
 
 
 def get_news_for_stock(ticker: str, limit: int = 5) -> List[Dict[str, Any]]:
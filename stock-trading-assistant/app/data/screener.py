@@ -1,18 +1,25 @@
 """
 Stock screening and discovery module
 """
-import yfinance as yf
 import pandas as pd
-from typing import List, Dict, Any, Optional
+import numpy as np
+from typing import List, Dict, Any, Coroutine, Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
 import logging
-import time
+from functools import lru_cache
 
-from app.config import get_settings, EXCHANGE_INFO
+from app.config import get_settings
+from app.data._hist_cache import cached_history_batch
+from app.data._screener_kernels import nanmean_rows, rolling_mean_std, stack_tails
+from app.data.market_data import get_cached_summary, get_market_hours, get_yahoo_ticker
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Maximum number of candidates fetched from Yahoo at the same time
+SCREEN_CONCURRENCY = 8
+
 
 # Predefined watchlists for different categories
 WATCHLIST_CATEGORIES = {
@@ -94,7 +101,7 @@ WATCHLIST_CATEGORIES = {
 def get_screening_candidates(
     categories: Optional[List[str]] = None,
     include_user_holdings: bool = True
-) -> List[tuple]:
+) -> Tuple[Tuple[str, str], ...]:
     """
     Get list of stocks to screen
     
@@ -103,13 +110,20 @@ def get_screening_candidates(
         include_user_holdings: Whether to include user's current holdings
     
     Returns:
-        List of (ticker, exchange) tuples
+        Tuple of (ticker, exchange) tuples; shared between calls, so it is
+        immutable
     """
+    return _candidates_for(None if categories is None else tuple(categories))
+
+
+@lru_cache(maxsize=64)
+def _candidates_for(categories: Optional[Tuple[str, ...]]) -> Tuple[Tuple[str, str], ...]:
+    """Deduplicated watchlist for a set of categories; WATCHLIST_CATEGORIES is static"""
     candidates = []
     
     # Add from categories
     if categories is None:
-        categories = list(WATCHLIST_CATEGORIES.keys())
+        categories = tuple(WATCHLIST_CATEGORIES.keys())
     
     for category in categories:
         if category in WATCHLIST_CATEGORIES:
@@ -123,7 +137,11 @@ def get_screening_candidates(
             seen.add(ticker)
             unique_candidates.append((ticker, exchange))
     
-    return unique_candidates
+    return tuple(unique_candidates)
+
+
+# Warm the all-categories watchlist used by the scheduler and dashboard
+_candidates_for(None)
 
 
 def screen_for_momentum(candidates: List[tuple], min_volume: int = 100000) -> List[Dict[str, Any]]:
@@ -134,55 +152,71 @@ def screen_for_momentum(candidates: List[tuple], min_volume: int = 100000) -> Li
     - Price above 20-day SMA
     - Recent volume spike
     - Positive momentum
+    
+    Not callable from a running event loop; await
+    screen_for_momentum_async() there.
     """
-    results = []
+    return _run_sync(screen_for_momentum_async(candidates, min_volume), "screen_for_momentum_async")
+
+
+async def screen_for_momentum_async(candidates: List[tuple], min_volume: int = 100000) -> List[Dict[str, Any]]:
+    """Async version of screen_for_momentum(); history is downloaded in one batch"""
+    histories = await asyncio.to_thread(_candidate_histories, candidates)
+    return _compute_momentum(histories, min_volume)
+
+
+def _compute_momentum(
+    histories: List[Tuple[str, str, pd.DataFrame]],
+    min_volume: int = 100000,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Momentum screen over prefetched history for all candidates at once
     
-    for ticker, exchange in candidates:
-        try:
-            yahoo_ticker = _get_yahoo_ticker(ticker, exchange)
-            stock = yf.Ticker(yahoo_ticker)
-            hist = stock.history(period="3mo")
-            
-            if hist.empty or len(hist) < 20:
-                continue
-            
-            current_price = hist["Close"].iloc[-1]
-            sma_20 = hist["Close"].tail(20).mean()
-            avg_volume = hist["Volume"].tail(20).mean()
-            current_volume = hist["Volume"].iloc[-1]
-            
-            # Check criteria
-            if current_price > sma_20 and avg_volume >= min_volume:
-                # Calculate momentum
-                price_5d_ago = hist["Close"].iloc[-5] if len(hist) >= 5 else current_price
-                momentum_5d = ((current_price - price_5d_ago) / price_5d_ago) * 100
-                
-                price_20d_ago = hist["Close"].iloc[-20] if len(hist) >= 20 else current_price
-                momentum_20d = ((current_price - price_20d_ago) / price_20d_ago) * 100
-                
-                volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
-                
-                results.append({
-                    "ticker": ticker,
-                    "exchange": exchange,
-                    "current_price": current_price,
-                    "sma_20": sma_20,
-                    "price_vs_sma": ((current_price - sma_20) / sma_20) * 100,
-                    "momentum_5d": momentum_5d,
-                    "momentum_20d": momentum_20d,
-                    "volume_ratio": volume_ratio,
-                    "avg_volume": avg_volume,
-                })
-            
-            time.sleep(0.1)  # Rate limiting
-            
-        except Exception as e:
-            logger.debug(f"Error screening {ticker}: {e}")
-            continue
+    The last 20 bars of every stock are stacked into (stocks, 20) matrices
+    so each metric is one array expression instead of a pandas call per
+    stock.
+    """
+    eligible = [(ticker, exchange, hist) for ticker, exchange, hist in histories if len(hist) >= 20]
+    if not eligible:
+        return []
+    
+    closes = np.array([hist["Close"].to_numpy(dtype=np.float64)[-20:] for _, _, hist in eligible])
+    volumes = np.array([hist["Volume"].to_numpy(dtype=np.float64)[-20:] for _, _, hist in eligible])
+    
+    current_price = closes[:, -1]
+    sma_20 = nanmean_rows(closes)
+    avg_volume = nanmean_rows(volumes)
+    current_volume = volumes[:, -1]
+    price_5d_ago = closes[:, -5]
+    price_20d_ago = closes[:, 0]
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_vs_sma = ((current_price - sma_20) / sma_20) * 100
+        momentum_5d = ((current_price - price_5d_ago) / price_5d_ago) * 100
+        momentum_20d = ((current_price - price_20d_ago) / price_20d_ago) * 100
+        volume_ratio = np.where(avg_volume > 0, current_volume / avg_volume, 1.0)
+    
+    # Check criteria
+    qualifies = (current_price > sma_20) & (avg_volume >= min_volume)
     
-    # Sort by momentum
-    results.sort(key=lambda x: x.get("momentum_5d", 0), reverse=True)
-    return results
+    # Sort by momentum; only the rows that are returned become dicts
+    order = _ranked(qualifies, -momentum_5d, limit)
+    
+    return [
+        {
+            "ticker": eligible[i][0],
+            "exchange": eligible[i][1],
+            "current_price": current_price[i],
+            "sma_20": sma_20[i],
+            "price_vs_sma": price_vs_sma[i],
+            "momentum_5d": momentum_5d[i],
+            "momentum_20d": momentum_20d[i],
+            "volume_ratio": volume_ratio[i],
+            "avg_volume": avg_volume[i],
+        }
+        for i in order
+    ]
 
 
 def screen_for_value(candidates: List[tuple]) -> List[Dict[str, Any]]:
@@ -193,56 +227,71 @@ def screen_for_value(candidates: List[tuple]) -> List[Dict[str, Any]]:
     - Low P/E relative to sector
     - Strong fundamentals
     - Price near 52-week low
+    
+    Not callable from a running event loop; await screen_for_value_async()
+    there.
     """
+    return _run_sync(screen_for_value_async(candidates), "screen_for_value_async")
+
+
+async def screen_for_value_async(candidates: List[tuple]) -> List[Dict[str, Any]]:
+    """Async version of screen_for_value(); candidates are fetched concurrently"""
+    infos = await _candidate_infos(candidates)
+    return _compute_value(infos)
+
+
+def _compute_value(
+    infos: List[Tuple[str, str, Dict[str, Any]]],
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Value screen over prefetched quote info"""
     results = []
-    
-    for ticker, exchange in candidates:
+    for ticker, exchange, info in infos:
         try:
-            yahoo_ticker = _get_yahoo_ticker(ticker, exchange)
-            stock = yf.Ticker(yahoo_ticker)
-            info = stock.info
-            
-            if not info:
-                continue
-            
-            pe_ratio = info.get("trailingPE")
-            forward_pe = info.get("forwardPE")
-            price_to_book = info.get("priceToBook")
-            current_price = info.get("regularMarketPrice")
-            week_52_low = info.get("fiftyTwoWeekLow")
-            week_52_high = info.get("fiftyTwoWeekHigh")
-            
-            # Skip if missing key data
-            if not all([current_price, week_52_low, week_52_high]):
-                continue
-            
-            # Calculate metrics
-            price_vs_52w_range = (current_price - week_52_low) / (week_52_high - week_52_low) if week_52_high > week_52_low else 0.5
-            
-            # Value criteria: lower half of 52-week range, reasonable P/E
-            if price_vs_52w_range < 0.5 and (pe_ratio is None or pe_ratio < 25):
-                results.append({
-                    "ticker": ticker,
-                    "exchange": exchange,
-                    "current_price": current_price,
-                    "pe_ratio": pe_ratio,
-                    "forward_pe": forward_pe,
-                    "price_to_book": price_to_book,
-                    "52w_low": week_52_low,
-                    "52w_high": week_52_high,
-                    "price_vs_52w_range": price_vs_52w_range,
-                    "sector": info.get("sector", "Unknown"),
-                })
-            
-            time.sleep(0.1)  # Rate limiting
-            
+            result = _value_metrics(ticker, exchange, info)
         except Exception as e:
             logger.debug(f"Error screening {ticker}: {e}")
             continue
+        if result is not None:
+            results.append(result)
     
     # Sort by proximity to 52-week low
     results.sort(key=lambda x: x.get("price_vs_52w_range", 1))
-    return results
+    return results[:limit]
+
+
+def _value_metrics(ticker: str, exchange: str, info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Value screen for a single stock's info; None if it doesn't qualify"""
+    pe_ratio = info.get("trailingPE")
+    forward_pe = info.get("forwardPE")
+    price_to_book = info.get("priceToBook")
+    current_price = info.get("regularMarketPrice")
+    week_52_low = info.get("fiftyTwoWeekLow")
+    week_52_high = info.get("fiftyTwoWeekHigh")
+    
+    # Skip if missing key data
+    if not all([current_price, week_52_low, week_52_high]):
+        return None
+    
+    # Calculate metrics
+    price_vs_52w_range = (current_price - week_52_low) / (week_52_high - week_52_low) if week_52_high > week_52_low else 0.5
+    
+    # Value criteria: lower half of 52-week range, reasonable P/E
+    if not (price_vs_52w_range < 0.5 and (pe_ratio is None or pe_ratio < 25)):
+        return None
+    
+    return {
+        "ticker": ticker,
+        "exchange": exchange,
+        "current_price": current_price,
+        "pe_ratio": pe_ratio,
+        "forward_pe": forward_pe,
+        "price_to_book": price_to_book,
+        "52w_low": week_52_low,
+        "52w_high": week_52_high,
+        "price_vs_52w_range": price_vs_52w_range,
+        "sector": info.get("sector", "Unknown"),
+    }
 
 
 def screen_for_volatility_breakout(candidates: List[tuple]) -> List[Dict[str, Any]]:
@@ -252,92 +301,152 @@ def screen_for_volatility_breakout(candidates: List[tuple]) -> List[Dict[str, An
     Returns stocks with:
     - Bollinger Band squeeze (low volatility)
     - Recent price movement suggesting breakout
+    
+    Not callable from a running event loop; await
+    screen_for_volatility_breakout_async() there.
     """
-    results = []
+    return _run_sync(screen_for_volatility_breakout_async(candidates), "screen_for_volatility_breakout_async")
+
+
+async def screen_for_volatility_breakout_async(candidates: List[tuple]) -> List[Dict[str, Any]]:
+    """Async version of screen_for_volatility_breakout(); history is downloaded in one batch"""
+    histories = await asyncio.to_thread(_candidate_histories, candidates)
+    return _compute_breakout(histories)
+
+
+def _compute_breakout(
+    histories: List[Tuple[str, str, pd.DataFrame]],
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Volatility breakout screen over prefetched history for all candidates
     
-    for ticker, exchange in candidates:
-        try:
-            yahoo_ticker = _get_yahoo_ticker(ticker, exchange)
-            stock = yf.Ticker(yahoo_ticker)
-            hist = stock.history(period="3mo")
-            
-            if hist.empty or len(hist) < 20:
-                continue
-            
-            close = hist["Close"]
-            current_price = close.iloc[-1]
-            
-            # Calculate Bollinger Bands
-            sma_20 = close.tail(20).mean()
-            std_20 = close.tail(20).std()
-            upper_band = sma_20 + (2 * std_20)
-            lower_band = sma_20 - (2 * std_20)
-            
-            # Band width (squeeze indicator)
-            band_width = (upper_band - lower_band) / sma_20
-            
-            # Historical band width for comparison
-            hist_band_widths = []
-            for i in range(20, len(close)):
-                period_close = close.iloc[i-20:i]
-                period_sma = period_close.mean()
-                period_std = period_close.std()
-                width = (2 * period_std * 2) / period_sma
-                hist_band_widths.append(width)
-            
-            if not hist_band_widths:
-                continue
-            
-            avg_band_width = sum(hist_band_widths) / len(hist_band_widths)
-            
-            # Look for squeeze (current width much lower than average)
-            if band_width < avg_band_width * 0.7:
-                # Check if breaking out
-                if current_price > upper_band or current_price < lower_band:
-                    breakout_direction = "bullish" if current_price > upper_band else "bearish"
-                else:
-                    breakout_direction = "squeeze"
-                
-                results.append({
-                    "ticker": ticker,
-                    "exchange": exchange,
-                    "current_price": current_price,
-                    "sma_20": sma_20,
-                    "upper_band": upper_band,
-                    "lower_band": lower_band,
-                    "band_width": band_width,
-                    "avg_band_width": avg_band_width,
-                    "squeeze_ratio": band_width / avg_band_width,
-                    "breakout_direction": breakout_direction,
-                })
-            
-            time.sleep(0.1)  # Rate limiting
-            
-        except Exception as e:
-            logger.debug(f"Error screening {ticker}: {e}")
-            continue
+    Closes are stacked into one (stocks, bars) matrix and every 20-day
+    Bollinger window is computed in a single kernel call.
+    """
+    eligible = [(ticker, exchange, hist) for ticker, exchange, hist in histories if len(hist) >= 20]
+    if not eligible:
+        return []
+    
+    closes = stack_tails([hist["Close"].to_numpy(dtype=np.float64) for _, _, hist in eligible])
+    means, stds = rolling_mean_std(closes, 20)
+    current_price = closes[:, -1]
+    
+    # Calculate Bollinger Bands
+    sma_20 = means[:, -1]
+    std_20 = stds[:, -1]
+    upper_band = sma_20 + (2 * std_20)
+    lower_band = sma_20 - (2 * std_20)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Band width (squeeze indicator)
+        band_width = (upper_band - lower_band) / sma_20
+        
+        # Historical band width for comparison: every earlier 20-day window
+        avg_band_width = nanmean_rows((4 * stds / means)[:, :-1])
+        squeeze_ratio = band_width / avg_band_width
+    
+    # Look for squeeze (current width much lower than average)
+    qualifies = band_width < avg_band_width * 0.7
+    
+    # Sort by squeeze intensity; only the rows that are returned become dicts
+    order = _ranked(qualifies, squeeze_ratio, limit)
+    
+    # Check if breaking out
+    breakout_direction = np.where(
+        current_price > upper_band, "bullish",
+        np.where(current_price < lower_band, "bearish", "squeeze"),
+    )
+    
+    return [
+        {
+            "ticker": eligible[i][0],
+            "exchange": eligible[i][1],
+            "current_price": current_price[i],
+            "sma_20": sma_20[i],
+            "upper_band": upper_band[i],
+            "lower_band": lower_band[i],
+            "band_width": band_width[i],
+            "avg_band_width": avg_band_width[i],
+            "squeeze_ratio": squeeze_ratio[i],
+            "breakout_direction": str(breakout_direction[i]),
+        }
+        for i in order
+    ]
+
+
+def _run_sync(coro: Coroutine[Any, Any, Any], async_name: str) -> Any:
+    """
+    asyncio.run() for the sync wrappers
+    
+    asyncio.run() cannot start inside a running event loop (an async
+    route, say), so fail there with a pointer to the async variant.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    coro.close()
+    raise RuntimeError(f"Called from a running event loop; await {async_name}() instead")
+
+
+def _ranked(mask: np.ndarray, key: np.ndarray, limit: Optional[int]) -> np.ndarray:
+    """
+    Indices where mask is set, ordered by ascending key and cut to limit
     
-    # Sort by squeeze intensity
-    results.sort(key=lambda x: x.get("squeeze_ratio", 1))
-    return results
+    The sort is stable, so ties keep candidate order as list.sort did.
+    """
+    selected = np.flatnonzero(mask)
+    return selected[np.argsort(key[selected], kind="stable")][:limit]
 
 
-def _get_yahoo_ticker(ticker: str, exchange: str) -> str:
-    """Convert ticker to Yahoo Finance format"""
-    if exchange in EXCHANGE_INFO:
-        suffix = EXCHANGE_INFO[exchange]["suffix"]
-        if suffix and not ticker.endswith(suffix):
-            return f"{ticker}{suffix}"
+async def _candidate_infos(candidates: List[tuple]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """
+    Value-screen quote fields for every candidate, fetched concurrently
     
-    if ".V" in ticker.upper() or exchange == "TSX-V":
-        base = ticker.replace(".V", "").replace(".v", "")
-        return f"{base}.V"
+    yfinance is blocking, so each fetch runs in a worker thread;
+    SCREEN_CONCURRENCY caps how many requests are in flight at once to
+    stay under Yahoo's rate limits. Returns (ticker, exchange, info) in
+    candidate order; candidates without info are left out.
+    """
+    semaphore = asyncio.Semaphore(SCREEN_CONCURRENCY)
+    
+    async def bounded(ticker: str, exchange: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(get_cached_summary, get_yahoo_ticker(ticker, exchange))
+            except Exception as e:
+                logger.debug(f"Error fetching info for {ticker}: {e}")
+                return {}
     
-    if ".TO" in ticker.upper() or exchange == "TSX":
-        base = ticker.replace(".TO", "").replace(".to", "")
-        return f"{base}.TO"
+    infos = await asyncio.gather(*(bounded(ticker, exchange) for ticker, exchange in candidates))
+    return [
+        (ticker, exchange, info)
+        for (ticker, exchange), info in zip(candidates, infos)
+        if info
+    ]
+
+
+def _candidate_histories(candidates: List[tuple]) -> List[Tuple[str, str, pd.DataFrame]]:
+    """
+    Three months of daily bars for every candidate, fetched in one batch
+    
+    Returns (ticker, exchange, history) in candidate order; candidates
+    without data are left out.
+    """
+    yahoo_tickers = [get_yahoo_ticker(ticker, exchange) for ticker, exchange in candidates]
+    hours = {
+        yahoo_ticker: get_market_hours(exchange)
+        for (_, exchange), yahoo_ticker in zip(candidates, yahoo_tickers)
+    }
+    histories = cached_history_batch(yahoo_tickers, period="3mo", hours=hours)
     
-    return ticker
+    return [
+        (ticker, exchange, histories[yahoo_ticker])
+        for (ticker, exchange), yahoo_ticker in zip(candidates, yahoo_tickers)
+        if yahoo_ticker in histories
+    ]
 
 
 def discover_opportunities(
@@ -347,13 +456,38 @@ def discover_opportunities(
     """
     Run all screens and return top opportunities
     
+    Not callable from a running event loop; await
+    discover_opportunities_async() there.
+    
     Returns:
         Dict with 'momentum', 'value', 'breakout' keys
     """
+    return _run_sync(discover_opportunities_async(categories, max_results), "discover_opportunities_async")
+
+
+async def discover_opportunities_async(
+    categories: Optional[List[str]] = None,
+    max_results: int = 10
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Async version of discover_opportunities()"""
     candidates = get_screening_candidates(categories)
+    return await _discover_async(candidates, max_results)
+
+
+async def _discover_async(candidates: List[tuple], max_results: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch what the screens need once, then run all three on the shared data
+    
+    Momentum and breakout both work off the same batch of history, and the
+    history batch and the info lookups are fetched at the same time.
+    """
+    histories, infos = await asyncio.gather(
+        asyncio.to_thread(_candidate_histories, candidates),
+        _candidate_infos(candidates),
+    )
     
     return {
-        "momentum": screen_for_momentum(candidates)[:max_results],
-        "value": screen_for_value(candidates)[:max_results],
-        "breakout": screen_for_volatility_breakout(candidates)[:max_results],
+        "momentum": _compute_momentum(histories, limit=max_results),
+        "value": _compute_value(infos, limit=max_results),
+        "breakout": _compute_breakout(histories, limit=max_results),
     }
@@ -1,13 +1,18 @@
 """
 Database models and connection management
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, Enum as SQLEnum
+from sqlalchemy import create_engine, select, bindparam, text, Index, Column, Integer, String, Float, DateTime, Boolean, Text, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker, raiseload, Session
+from sqlalchemy.pool import StaticPool
 from datetime import datetime
 import enum
-from typing import Generator
+from typing import Dict, Generator, Tuple
 import os
+import threading
+import time
 
 from app.config import get_settings
 
@@ -16,11 +21,24 @@ settings = get_settings()
 # Ensure data directory exists
 os.makedirs("data", exist_ok=True)
 
-# Create engine
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+# Create engine; the scheduler and the web routes use it concurrently
+if "sqlite" in settings.database_url:
+    engine_options = {"connect_args": {"check_same_thread": False}}
+    # A file database gets SQLAlchemy's default QueuePool. An in-memory one
+    # only exists on its single connection, so that connection is shared
+    if settings.database_url in ("sqlite://", "sqlite:///:memory:"):
+        engine_options["poolclass"] = StaticPool
+else:
+    engine_options = {
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_pre_ping": True,  # drop connections the server closed while idle
+        "pool_recycle": 3600,
+    }
+
+# Room in the compiled-statement cache for every query shape the app uses
+engine = create_engine(settings.database_url, query_cache_size=1200, **engine_options)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -29,6 +47,19 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def strict(query):
+    """
+    Make lazy loading raise for a query or select() in debug mode
+    
+    Relationships the query needs must be loaded explicitly (selectinload);
+    touching any other one raises instead of quietly issuing a query per
+    row. Outside debug mode the query is returned unchanged.
+    """
+    if settings.debug:
+        return query.options(raiseload("*"))
+    return query
+
+
 class RecommendationType(str, enum.Enum):
     STRONG_BUY = "STRONG_BUY"
     BUY = "BUY"
@@ -82,7 +113,7 @@ class Recommendation(Base):
     __tablename__ = "recommendations"
     
     id = Column(Integer, primary_key=True, index=True)
-    ticker = Column(String(20), index=True, nullable=False)
+    ticker = Column(String(20), nullable=False)  # see ix_recommendations_ticker_created_at
     exchange = Column(String(20), nullable=False)
     recommendation_type = Column(SQLEnum(RecommendationType), nullable=False)
     
@@ -122,6 +153,24 @@ class Recommendation(Base):
         return f"<Recommendation {self.recommendation_type.value} {self.ticker} @ {self.price_at_recommendation}>"
 
 
+# Per-ticker history newest first (latest recommendation per holding); also serves
+# plain ticker lookups, so ticker has no index of its own
+Index(
+    "ix_recommendations_ticker_created_at",
+    Recommendation.ticker,
+    Recommendation.created_at.desc(),
+)
+
+# Emailed recommendations by date, for the daily limit count; partial so it
+# only holds the few rows that were actually sent
+Index(
+    "ix_recommendations_sent_created_at",
+    Recommendation.created_at,
+    postgresql_where=Recommendation.email_sent == True,
+    sqlite_where=Recommendation.email_sent == True,
+)
+
+
 class PortfolioSnapshot(Base):
     """Daily portfolio value snapshots for performance tracking"""
     __tablename__ = "portfolio_snapshots"
@@ -172,6 +221,16 @@ class WatchlistItem(Base):
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    
+    # create_all skips tables that already exist, so add indexes introduced
+    # after a database was created
+    for index in Recommendation.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    
+    # ix_recommendations_ticker_created_at replaced the ticker-only index;
+    # drop it from databases created before that
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_recommendations_ticker"))
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -183,24 +242,86 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+# Built once so every settings lookup reuses the same cached compiled SQL
+_SETTING_BY_KEY = select(SystemSettings).where(SystemSettings.key == bindparam("key"))
+
+# Dialects with INSERT ... ON CONFLICT; others use the ORM fallback
+_UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+# Settings change rarely and every write goes through update_setting(), so
+# reads are served from memory for a short while
+SETTINGS_CACHE_SECONDS = 60
+_settings_cache: Dict[str, Tuple[str, float]] = {}  # {key: (value, cached_at)}
+_settings_cache_lock = threading.Lock()
+
+
 def get_or_create_setting(db: Session, key: str, default_value: str) -> str:
     """Get a setting or create with default if not exists"""
-    setting = db.query(SystemSettings).filter(SystemSettings.key == key).first()
+    with _settings_cache_lock:
+        cached = _settings_cache.get(key)
+    if cached is not None and time.monotonic() - cached[1] < SETTINGS_CACHE_SECONDS:
+        return cached[0]
+    
+    value = _get_or_create_setting(db, key, default_value)
+    _cache_setting(key, value)
+    return value
+
+
+def _get_or_create_setting(db: Session, key: str, default_value: str) -> str:
+    """Database side of get_or_create_setting()"""
+    setting = db.execute(_SETTING_BY_KEY, {"key": key}).scalars().first()
     if setting:
         return setting.value
     
-    new_setting = SystemSettings(key=key, value=default_value)
-    db.add(new_setting)
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        db.add(SystemSettings(key=key, value=default_value))
+        db.commit()
+        return default_value
+    
+    # Insert-if-absent in one statement, so two callers creating the same
+    # default can't trip the unique constraint
+    result = db.execute(
+        insert(SystemSettings)
+        .values(key=key, value=default_value)
+        .on_conflict_do_nothing(index_elements=["key"])
+    )
     db.commit()
+    
+    if result.rowcount == 0:
+        # Another caller created it first
+        return db.execute(_SETTING_BY_KEY, {"key": key}).scalars().one().value
     return default_value
 
 
 def update_setting(db: Session, key: str, value: str) -> None:
     """Update a system setting"""
-    setting = db.query(SystemSettings).filter(SystemSettings.key == key).first()
-    if setting:
-        setting.value = value
-    else:
-        setting = SystemSettings(key=key, value=value)
-        db.add(setting)
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        setting = db.execute(_SETTING_BY_KEY, {"key": key}).scalars().first()
+        if setting:
+            setting.value = value
+        else:
+            setting = SystemSettings(key=key, value=value)
+            db.add(setting)
+        db.commit()
+        _cache_setting(key, value)
+        return
+    
+    # Single INSERT ... ON CONFLICT DO UPDATE instead of SELECT then write
+    db.execute(
+        insert(SystemSettings)
+        .values(key=key, value=value)
+        .on_conflict_do_update(
+            index_elements=["key"],
+            set_={"value": value, "updated_at": datetime.utcnow()},
+        )
+    )
     db.commit()
+    _cache_setting(key, value)
+
+
+def _cache_setting(key: str, value: str) -> None:
+    """Remember a setting's current value"""
+    with _settings_cache_lock:
+        _settings_cache[key] = (value, time.monotonic())
@@ -6,13 +6,16 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from contextlib import asynccontextmanager
 import logging
 import os
+from typing import Dict
 
 from app.database import init_db
 from app.web.routes import router as web_router
 from app.scheduler.jobs import run_scheduled_check
+from app.data.forex import refresh_rates, CACHE_DURATION
 from app.config import get_settings
 
 logging.basicConfig(
@@ -60,6 +63,15 @@ async def lifespan(app: FastAPI):
         replace_existing=True
     )
     
+    # Keep exchange rates warm, refreshing a minute before they expire
+    scheduler.add_job(
+        refresh_rates,
+        IntervalTrigger(seconds=CACHE_DURATION - 60),
+        id='forex_refresh',
+        name='Exchange Rate Refresh',
+        replace_existing=True
+    )
+    
     scheduler.start()
     logger.info("Scheduler started with 3 daily market checks")
     
@@ -84,7 +96,7 @@ app.include_router(web_router)
 
 
 @app.get("/health")
-async def health_check():
+async def health_check() -> Dict[str, str]:
     return {"status": "healthy", "version": "1.0.0"}
 
 
@@ -3,10 +3,11 @@ Portfolio management module
 """
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, date
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
 import logging
 
-from app.database import Holding, CashBalance, PortfolioSnapshot, RiskCategory
+from app.database import Holding, CashBalance, PortfolioSnapshot, Recommendation, RiskCategory, strict
 from app.data.market_data import get_stock_info, get_multiple_quotes
 from app.data.forex import convert_to_chf, get_exchange_rate_to_chf
 from app.config import get_settings, EXCHANGE_INFO
@@ -25,7 +26,29 @@ class PortfolioManager:
     
     def get_holdings(self) -> List[Holding]:
         """Get all current holdings"""
-        return self.db.query(Holding).all()
+        return strict(self.db.query(Holding)).all()
+    
+    def get_latest_recommendations(self) -> Dict[str, Recommendation]:
+        """
+        Most recent recommendation for each held ticker, in one query
+        
+        Each holding's newest created_at is one seek on
+        ix_recommendations_ticker_created_at, and only the matching rows are
+        read, so the cost does not grow with the stored history.
+        """
+        newest = (
+            select(func.max(Recommendation.created_at))
+            .where(Recommendation.ticker == Holding.ticker)
+            .scalar_subquery()
+        )
+        recommendations = strict(
+            self.db.query(Recommendation)
+            .filter(tuple_(Recommendation.ticker, Recommendation.created_at).in_(
+                select(Holding.ticker, newest)
+            ))
+            .order_by(Recommendation.id)
+        ).all()
+        return {rec.ticker: rec for rec in recommendations}
     
     def get_holding(self, ticker: str) -> Optional[Holding]:
         """Get a specific holding by ticker"""
@@ -1,6 +1,7 @@
 """
 Scheduled jobs for market monitoring and analysis
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, time
 from typing import List, Dict, Any
 import logging
@@ -195,30 +196,52 @@ class MarketMonitor:
         
         analyses.sort(key=priority_key)
         
-        sent_count = 0
+        selected = []
         for item in analyses:
             analysis = item["analysis"]
-            action = item["action"]
             
             rec_type = analysis.get("recommendation", "HOLD")
             
             if rec_type == "HOLD" and not analysis.get("unusual_activity"):
                 continue
             
-            if not can_send or sent_count >= settings.max_daily_recommendations:
+            if not can_send or len(selected) >= settings.max_daily_recommendations:
                 logger.info(f"Would recommend {rec_type} for {item['ticker']} (score: {analysis.get('combined_score')})")
                 continue
             
-            recommendation = self._create_recommendation(db, item, portfolio, portfolio_mgr)
-            
-            if self._send_recommendation_email(recommendation, analysis, action, portfolio):
+            selected.append(item)
+        
+        if not selected:
+            return
+        
+        # Write the whole run in one transaction instead of a commit per row;
+        # on PostgreSQL the flush is a single multi-row INSERT ... RETURNING
+        recommendations = [self._build_recommendation(item, portfolio) for item in selected]
+        db.add_all(recommendations)
+        db.flush()
+        ids = [rec.id for rec in recommendations]
+        db.commit()
+        
+        # Commit expires the rows; reload them together rather than one by one
+        db.query(Recommendation).filter(Recommendation.id.in_(ids)).all()
+        
+        # Each send is a blocking HTTPS call, so send the batch concurrently
+        emails = [
+            self._recommendation_email(recommendation, item["action"], portfolio)
+            for item, recommendation in zip(selected, recommendations)
+        ]
+        with ThreadPoolExecutor(max_workers=len(emails)) as executor:
+            results = list(executor.map(lambda email: self.email_sender.send_recommendation(**email), emails))
+        
+        for recommendation, sent in zip(recommendations, results):
+            if sent:
                 recommendation.email_sent = True
-                db.commit()
-                sent_count += 1
-                logger.info(f"Sent {rec_type} recommendation for {item['ticker']}")
+                logger.info(f"Sent {recommendation.recommendation_type.value} recommendation for {recommendation.ticker}")
+        
+        db.commit()
     
-    def _create_recommendation(self, db: Session, item: Dict[str, Any], portfolio: Dict[str, Any], portfolio_mgr: PortfolioManager) -> Recommendation:
-        """Create a recommendation record in database"""
+    def _build_recommendation(self, item: Dict[str, Any], portfolio: Dict[str, Any]) -> Recommendation:
+        """Build a recommendation record; the caller adds and commits it"""
         analysis = item["analysis"]
         action = item["action"]
         
@@ -241,10 +264,6 @@ class MarketMonitor:
             cash_after_trade=self._calculate_cash_after(portfolio, action),
         )
         
-        db.add(rec)
-        db.commit()
-        db.refresh(rec)
-        
         return rec
     
     def _calculate_cash_after(self, portfolio: Dict[str, Any], action: Dict[str, Any]) -> float:
@@ -259,9 +278,9 @@ class MarketMonitor:
             return cash + value
         return cash
     
-    def _send_recommendation_email(self, recommendation: Recommendation, analysis: Dict[str, Any], action: Dict[str, Any], portfolio: Dict[str, Any]) -> bool:
-        """Send recommendation email"""
-        return self.email_sender.send_recommendation(
+    def _recommendation_email(self, recommendation: Recommendation, action: Dict[str, Any], portfolio: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the send_recommendation() arguments for a recommendation"""
+        return dict(
             ticker=recommendation.ticker,
             exchange=recommendation.exchange,
             recommendation=recommendation.recommendation_type.value,
@@ -281,7 +300,8 @@ class MarketMonitor:
                 "fundamental": recommendation.fundamental_score,
                 "sentiment": recommendation.sentiment_score,
                 "combined": recommendation.combined_score,
-            }
+            },
+            generated_at=recommendation.created_at,
         )
     
     def analyze_single_stock(self, ticker: str, exchange: str = "") -> Dict[str, Any]:
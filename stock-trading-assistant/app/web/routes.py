@@ -1,15 +1,16 @@
 """
 Web dashboard routes
 """
-from fastapi import APIRouter, Request, Depends, Form, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Request, Depends, Form, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import json
 
-from app.database import get_db, Holding, Recommendation, CashBalance, get_or_create_setting, update_setting, RiskCategory
+from app.database import get_db, Holding, Recommendation, CashBalance, get_or_create_setting, update_setting, RiskCategory, strict
 from app.portfolio.manager import PortfolioManager
 from app.scheduler.jobs import get_market_monitor
 from app.notifications.email import get_email_sender
@@ -19,12 +20,15 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# Routes that touch the database or Yahoo are plain functions: the session
+# and data clients are blocking, so FastAPI runs them in its threadpool
+# instead of stalling the event loop
 router = APIRouter()
 templates = Jinja2Templates(directory="app/web/templates")
 
 
 @router.get("/", response_class=HTMLResponse)
-async def dashboard(request: Request, db: Session = Depends(get_db)):
+def dashboard(request: Request, db: Session = Depends(get_db)):
     """Main dashboard page"""
     portfolio_mgr = PortfolioManager(db)
     portfolio = portfolio_mgr.get_portfolio_value()
@@ -32,9 +36,9 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
     performance = portfolio_mgr.get_performance_history(days=30)
     
     # Get recent recommendations
-    recent_recommendations = db.query(Recommendation).order_by(
+    recent_recommendations = strict(db.query(Recommendation).order_by(
         Recommendation.created_at.desc()
-    ).limit(10).all()
+    ).limit(10)).all()
     
     # Get system status
     is_active = get_or_create_setting(db, "system_active", "true").lower() == "true"
@@ -60,11 +64,13 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/holdings", response_class=HTMLResponse)
-async def holdings_page(request: Request, db: Session = Depends(get_db)):
+def holdings_page(request: Request, db: Session = Depends(get_db)):
     """Holdings management page"""
     portfolio_mgr = PortfolioManager(db)
     portfolio = portfolio_mgr.get_portfolio_value()
     
+    latest_recommendations = portfolio_mgr.get_latest_recommendations()
+    
     # Get cash balances
     cash_balances = db.query(CashBalance).all()
     
@@ -74,13 +80,14 @@ async def holdings_page(request: Request, db: Session = Depends(get_db)):
     return templates.TemplateResponse("holdings.html", {
         "request": request,
         "portfolio": portfolio,
+        "latest_recommendations": latest_recommendations,
         "cash_balances": cash_balances,
         "exchange_rates": rates,
     })
 
 
 @router.post("/holdings/add")
-async def add_holding(
+def add_holding(
     request: Request,
     ticker: str = Form(...),
     exchange: str = Form(...),
@@ -117,7 +124,7 @@ async def add_holding(
 
 
 @router.post("/holdings/update/{ticker}")
-async def update_holding(
+def update_holding(
     ticker: str,
     shares: Optional[float] = Form(None),
     purchase_price: Optional[float] = Form(None),
@@ -149,7 +156,7 @@ async def update_holding(
 
 
 @router.post("/holdings/delete/{ticker}")
-async def delete_holding(ticker: str, db: Session = Depends(get_db)):
+def delete_holding(ticker: str, db: Session = Depends(get_db)):
     """Delete a holding"""
     portfolio_mgr = PortfolioManager(db)
     
@@ -160,7 +167,7 @@ async def delete_holding(ticker: str, db: Session = Depends(get_db)):
 
 
 @router.post("/cash/set")
-async def set_cash_balance(
+def set_cash_balance(
     amount: float = Form(...),
     currency: str = Form("CHF"),
     db: Session = Depends(get_db)
@@ -172,11 +179,11 @@ async def set_cash_balance(
 
 
 @router.get("/recommendations", response_class=HTMLResponse)
-async def recommendations_page(request: Request, db: Session = Depends(get_db)):
+def recommendations_page(request: Request, db: Session = Depends(get_db)):
     """Recommendations history page"""
-    recommendations = db.query(Recommendation).order_by(
+    recommendations = strict(db.query(Recommendation).order_by(
         Recommendation.created_at.desc()
-    ).limit(50).all()
+    ).limit(50)).all()
     
     return templates.TemplateResponse("recommendations.html", {
         "request": request,
@@ -185,7 +192,7 @@ async def recommendations_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.post("/recommendations/{rec_id}/mark-executed")
-async def mark_recommendation_executed(
+def mark_recommendation_executed(
     rec_id: int,
     execution_price: float = Form(...),
     db: Session = Depends(get_db)
@@ -205,7 +212,7 @@ async def mark_recommendation_executed(
 
 
 @router.get("/analyze/{ticker}", response_class=HTMLResponse)
-async def analyze_stock(
+def analyze_stock(
     request: Request,
     ticker: str,
     exchange: str = "",
@@ -238,7 +245,7 @@ async def analyze_stock_form(
 
 
 @router.post("/settings/toggle-active")
-async def toggle_system_active(db: Session = Depends(get_db)):
+def toggle_system_active(db: Session = Depends(get_db)):
     """Toggle system active/paused"""
     current = get_or_create_setting(db, "system_active", "true")
     new_value = "false" if current.lower() == "true" else "true"
@@ -247,7 +254,7 @@ async def toggle_system_active(db: Session = Depends(get_db)):
 
 
 @router.post("/settings/test-email")
-async def test_email(db: Session = Depends(get_db)):
+def test_email(db: Session = Depends(get_db)):
     """Send a test email"""
     email_sender = get_email_sender()
     
@@ -263,39 +270,40 @@ async def test_email(db: Session = Depends(get_db)):
 
 
 @router.post("/run-check")
-async def run_manual_check(db: Session = Depends(get_db)):
+def run_manual_check(background_tasks: BackgroundTasks):
     """Manually trigger a market check"""
-    try:
-        monitor = get_market_monitor()
-        monitor.run_market_check()
-        return RedirectResponse(url="/", status_code=303)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # A full check analyzes dozens of stocks and sends the emails; run it
+    # after the redirect instead of holding the request open. Failures are
+    # logged by run_market_check
+    background_tasks.add_task(get_market_monitor().run_market_check)
+    return RedirectResponse(url="/", status_code=303)
 
 
+# The JSON endpoints declare their return types so FastAPI serializes the
+# result straight to JSON bytes with Pydantic, skipping jsonable_encoder
 @router.get("/api/portfolio")
-async def api_portfolio(db: Session = Depends(get_db)):
+def api_portfolio(db: Session = Depends(get_db)) -> Dict[str, Any]:
     """API endpoint for portfolio data"""
     portfolio_mgr = PortfolioManager(db)
     return portfolio_mgr.get_portfolio_value()
 
 
 @router.get("/api/performance")
-async def api_performance(days: int = 30, db: Session = Depends(get_db)):
+def api_performance(days: int = 30, db: Session = Depends(get_db)) -> List[Dict[str, Any]]:
     """API endpoint for performance history"""
     portfolio_mgr = PortfolioManager(db)
     return portfolio_mgr.get_performance_history(days)
 
 
 @router.get("/api/analyze/{ticker}")
-async def api_analyze(ticker: str, exchange: str = "", db: Session = Depends(get_db)):
+def api_analyze(ticker: str, exchange: str = "", db: Session = Depends(get_db)) -> Dict[str, Any]:
     """API endpoint for stock analysis"""
     monitor = get_market_monitor()
     return monitor.analyze_single_stock(ticker, exchange)
 
 
 @router.get("/chat", response_class=HTMLResponse)
-async def chat_page(request: Request, db: Session = Depends(get_db)):
+def chat_page(request: Request, db: Session = Depends(get_db)):
     """AI Chat page"""
     advisor = get_ai_advisor()
     portfolio_mgr = PortfolioManager(db)
@@ -313,16 +321,17 @@ async def api_chat(
     request: Request,
     message: str = Form(...),
     db: Session = Depends(get_db)
-):
+) -> Dict[str, Any]:
     """API endpoint for AI chat"""
     advisor = get_ai_advisor()
     
     if not advisor.is_configured():
         return {"error": "AI not configured. Add ANTHROPIC_API_KEY to environment."}
     
+    # Portfolio valuation hits the database and Yahoo; keep it off the event loop
     portfolio_mgr = PortfolioManager(db)
-    portfolio = portfolio_mgr.get_portfolio_value()
+    portfolio = await run_in_threadpool(portfolio_mgr.get_portfolio_value)
     
-    response = advisor.chat(message, portfolio)
+    response = await advisor.chat_async(message, portfolio)
     
     return {"response": response}